@@ -1,4 +1,11 @@
 import os
+import secrets
+import threading
+import time
+import multiprocessing
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
 from typing import Optional
 from passlib.context import CryptContext
@@ -8,22 +15,156 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Security configuration
-SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-for-development")
+DEFAULT_SECRET_KEY = "your-secret-key-for-development"
+SECRET_KEY = os.getenv("SECRET_KEY") or DEFAULT_SECRET_KEY
+# Tokens signed with the public default key can be forged, so sessions are only restored with a real key
+SESSION_RESTORE_ENABLED = SECRET_KEY != DEFAULT_SECRET_KEY
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30  # 30 minutes token validity
 
 # Password hashing setup
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "2"))
+HASH_TIMEOUT_SECONDS = 30
+
+# Failed login rate limiting
+MAX_FAILED_LOGINS = int(os.getenv("MAX_FAILED_LOGINS", "5"))
+FAILED_LOGIN_WINDOW_SECONDS = 300
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+_hash_pool = None
+_hash_pool_lock = threading.Lock()
+
+
+class HashingBusyError(RuntimeError):
+    """The hashing pool didn't finish in time; the caller should ask the user to try again"""
+
+
+def _get_hash_pool():
+    """
+    Bounded process pool for bcrypt so hashing doesn't hold the GIL
+    and stall every other Streamlit session on this worker
+    """
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            # spawn avoids forking a multi-threaded Streamlit server
+            _hash_pool = ProcessPoolExecutor(
+                max_workers=HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _hash_pool
+
+
+def _run_in_pool(fn, *args):
+    global _hash_pool
+    future = None
+    try:
+        future = _get_hash_pool().submit(fn, *args)
+        return future.result(timeout=HASH_TIMEOUT_SECONDS)
+    except FutureTimeoutError as e:
+        # An overloaded pool; drop the queued call rather than leave the user waiting
+        future.cancel()
+        raise HashingBusyError("Password check timed out") from e
+    except BrokenProcessPool:
+        # A crashed worker breaks the pool; rebuild it next time and hash inline now
+        with _hash_pool_lock:
+            _hash_pool = None
+        return fn(*args)
+
+
+def _verify(plain_password, hashed_password):
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _hash(password):
+    return pwd_context.hash(password)
 
 
 def verify_password(plain_password, hashed_password):
     """Verify that the password matches the hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return _run_in_pool(_verify, plain_password, hashed_password)
 
 
 def get_password_hash(password):
     """Generate a hash from a password"""
-    return pwd_context.hash(password)
+    return _run_in_pool(_hash, password)
+
+
+class LoginRateLimiter:
+    """Track failed logins per email so repeated failures are rejected before hashing"""
+
+    def __init__(self, max_failures=MAX_FAILED_LOGINS, window_seconds=FAILED_LOGIN_WINDOW_SECONDS):
+        self.max_failures = max_failures
+        self.window_seconds = window_seconds
+        self._failures = defaultdict(deque)
+        self._lock = threading.Lock()
+
+    def _prune(self, key, now):
+        failures = self._failures[key]
+        while failures and now - failures[0] > self.window_seconds:
+            failures.popleft()
+        if not failures:
+            del self._failures[key]
+        return failures
+
+    def retry_after(self, email):
+        """Seconds until the email may try again, or 0 if it isn't blocked"""
+        key = email.strip().lower()
+        now = time.monotonic()
+        with self._lock:
+            failures = self._prune(key, now)
+            if len(failures) < self.max_failures:
+                return 0
+            return int(self.window_seconds - (now - failures[0])) + 1
+
+    def record_failure(self, email):
+        with self._lock:
+            self._failures[email.strip().lower()].append(time.monotonic())
+
+    def reset(self, email):
+        with self._lock:
+            self._failures.pop(email.strip().lower(), None)
+
+
+login_limiter = LoginRateLimiter()
+
+
+class SessionStore:
+    """Server-side record of issued session tokens, so logout revokes a token before it expires"""
+
+    def __init__(self, ttl_seconds=ACCESS_TOKEN_EXPIRE_MINUTES * 60):
+        self.ttl_seconds = ttl_seconds
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def _prune(self, now):
+        expired = [sid for sid, (_, expires_at) in self._sessions.items() if expires_at <= now]
+        for sid in expired:
+            del self._sessions[sid]
+
+    def open(self, user_id):
+        sid = secrets.token_urlsafe(24)
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            self._sessions[sid] = (user_id, now + self.ttl_seconds)
+        return sid
+
+    def user_id(self, sid):
+        with self._lock:
+            session = self._sessions.get(sid)
+            if not session or session[1] <= time.monotonic():
+                return None
+            return session[0]
+
+    def revoke(self, sid):
+        with self._lock:
+            self._sessions.pop(sid, None)
+
+
+session_store = SessionStore()
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -44,4 +185,32 @@ def decode_token(token):
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
     except jwt.PyJWTError:
-        return None
\ No newline at end of file
+        return None
+
+
+def create_session_token(user_id):
+    """Signed token for restoring a login, or None when SECRET_KEY is not configured"""
+    if not SESSION_RESTORE_ENABLED:
+        return None
+    return create_access_token({"sub": str(user_id), "sid": session_store.open(user_id)})
+
+
+def user_id_from_token(token):
+    """Return the user id of a valid, unrevoked session token, without touching the database"""
+    if not SESSION_RESTORE_ENABLED or not token:
+        return None
+    payload = decode_token(token)
+    if not payload or "sub" not in payload or "sid" not in payload:
+        return None
+    try:
+        user_id = int(payload["sub"])
+    except (TypeError, ValueError):
+        return None
+    return user_id if session_store.user_id(payload["sid"]) == user_id else None
+
+
+def revoke_session_token(token):
+    """Invalidate a session token on logout"""
+    payload = decode_token(token) if token else None
+    if payload and "sid" in payload:
+        session_store.revoke(payload["sid"])
@@ -0,0 +1,101 @@
+"""
+Load test for the login path.
+
+Runs N concurrent password verifications, first inline on the calling threads
+and then through auth's process pool, and reports p50/p95 login latency plus
+how long a concurrent "other session" heartbeat was stalled.
+
+Usage:
+    python -m benchmarks.bench_auth --logins 32 --concurrency 8 --rounds 12 --output bench_auth.json
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+PASSWORD = "correct horse battery staple"
+
+
+def _heartbeat(stop, lags, interval=0.01):
+    """Stand-in for another session: record how late each 10ms tick fires"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        time.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+def run_logins(verify, hashed, logins, concurrency):
+    from benchmarks.harness import percentile
+
+    samples = []
+    lags = []
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat, args=(stop, lags), daemon=True)
+
+    def login():
+        start = time.perf_counter()
+        assert verify(PASSWORD, hashed)
+        samples.append(time.perf_counter() - start)
+
+    heartbeat.start()
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(login) for _ in range(logins)]:
+            future.result()
+    wall = time.perf_counter() - wall_start
+    stop.set()
+    heartbeat.join()
+
+    return {
+        "logins": logins,
+        "concurrency": concurrency,
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "throughput_per_s": round(logins / wall, 3),
+        "heartbeat_p95_lag_ms": round(percentile(lags, 95) * 1000, 3),
+        "peak_memory_kb": None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent login load test")
+    parser.add_argument("--logins", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor")
+    parser.add_argument("--workers", type=int, default=2, help="Hash process pool size")
+    parser.add_argument("--output", help="Path of the JSON report")
+    args = parser.parse_args(argv)
+
+    # auth reads its configuration at import time
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    os.environ["HASH_WORKERS"] = str(args.workers)
+    import auth
+    from benchmarks.harness import write_report
+
+    hashed = auth.get_password_hash(PASSWORD)
+    # Warm the pool so process start-up isn't counted as login latency
+    auth.verify_password(PASSWORD, hashed)
+
+    results = [
+        {"stage": "login_inline", **run_logins(auth.pwd_context.verify, hashed, args.logins, args.concurrency)},
+        {"stage": "login_pool", **run_logins(auth.verify_password, hashed, args.logins, args.concurrency)},
+    ]
+    return write_report(
+        "auth",
+        results,
+        args.output,
+        logins=args.logins,
+        concurrency=args.concurrency,
+        rounds=args.rounds,
+        workers=args.workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Offline benchmark of the generation pipeline.
+
+Replays recorded career pages through clean_text, Chain.extract_jobs and the
+write_* methods using a deterministic fake chat model, then persists the
+results through db_operations into a throwaway SQLite database.
+
+Usage:
+    python -m benchmarks.bench_pipeline --iterations 10 --latency 0.05 --token-rate 400 --output bench_output.json
+"""
+import argparse
+import csv
+import glob
+import itertools
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pages")
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def _configure_database():
+    # Point database.py at a private SQLite file before it creates its engine
+    db_dir = tempfile.mkdtemp(prefix="bench_db_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(db_dir, 'bench.db')}"
+
+
+def load_pages(pattern="*"):
+    """Return (name, raw_html, extraction_json_path) for each recorded page"""
+    pages = []
+    for html_path in sorted(glob.glob(os.path.join(PAGES_DIR, f"{pattern}.html"))):
+        name = os.path.splitext(os.path.basename(html_path))[0]
+        with open(html_path, encoding="utf-8") as f:
+            pages.append((name, f.read(), html_path[:-len(".html")] + ".json"))
+    return pages
+
+
+def page_text(raw_html):
+    """Mimic WebBaseLoader, which hands page_content = soup.get_text() to the pipeline"""
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(raw_html, "html.parser").get_text()
+
+
+def seed_user(db, db_ops):
+    """Create a benchmark user with the sample portfolio"""
+    user = db_ops.create_user(db, "bench@example.com", "not-a-real-hash")
+    with open(os.path.join(ROOT, "resource", "my_portfolio.csv"), newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            db_ops.create_portfolio_item(db, user.id, row["Techstack"], row["Links"])
+    return user.id
+
+
+def run(iterations, latency, token_rate, output_tokens, pattern, draft_speedup=4.0, draft_failure_rate=0.0):
+    _configure_database()
+
+    from benchmarks.fake_llm import FakeChatModel, load_extraction_response
+    from benchmarks.harness import measure_stage
+    from chains import Chain
+    from database import SessionLocal, init_db
+    from utils import clean_text
+    import db_operations as db_ops
+    import model_routing
+    import structured_data
+    import template_reuse
+
+    init_db()
+    db = SessionLocal()
+    user_id = seed_user(db, db_ops)
+
+    results = []
+    for name, raw_html, extraction_path in load_pages(pattern):
+        llm = FakeChatModel(
+            extraction_response=load_extraction_response(extraction_path),
+            latency=latency,
+            tokens_per_second=token_rate,
+            output_tokens=output_tokens,
+            model_name=model_routing.DEFAULT_MODEL,
+        )
+        chain = Chain(llm=llm)
+        # Same pages through a faster, less reliable draft model with escalation to llm
+        draft_llm = FakeChatModel(
+            extraction_response=load_extraction_response(extraction_path),
+            latency=latency / draft_speedup,
+            tokens_per_second=token_rate * draft_speedup,
+            output_tokens=output_tokens,
+            model_name=model_routing.EXTRACT_DRAFT_MODEL,
+            extraction_failure_rate=draft_failure_rate,
+        )
+        routed_chain = Chain(llm=llm, extract_llm=draft_llm)
+        text = page_text(raw_html)
+
+        stats, cleaned = measure_stage("clean_text", lambda: clean_text(text), iterations)
+        results.append({"page": name, **stats})
+
+        stats, jobs = measure_stage("extract_jobs", lambda: chain.extract_jobs(cleaned), iterations)
+        results.append({"page": name, **stats})
+        structured_data.stats.record_llm(stats["p50_ms"] / 1000)
+
+        # Streaming extraction hands the first job to later stages before the response ends
+        stats, _ = measure_stage("extract_first_job", lambda: next(chain.stream_jobs(cleaned), None), iterations)
+        results.append({"page": name, **stats})
+
+        stats, _ = measure_stage("extract_jobs_routed", lambda: routed_chain.extract_jobs(cleaned), iterations)
+        results.append({"page": name, **stats})
+
+        # Structured-data fast path that would replace extract_jobs on a hit
+        stats, (_, source) = measure_stage(
+            "structured_data",
+            lambda: structured_data.extract_structured_jobs(f"file://{name}.html", raw_html),
+            iterations,
+        )
+        results.append({"page": name, **stats, "source": source})
+
+        def match_portfolio():
+            return [
+                [{"techstack": item.tech_stack, "links": item.link}
+                 for item in db_ops.query_portfolio_by_skills(db, user_id, job.get("skills", []))]
+                for job in jobs
+            ]
+
+        stats, portfolios = measure_stage("query_portfolio", match_portfolio, iterations, len(jobs))
+        results.append({"page": name, **stats})
+
+        writers = {
+            "write_letter": lambda job, items: chain.write_letter(job, items),
+            "write_resume": lambda job, items: chain.write_resume(job),
+            "write_cold_email": lambda job, items: chain.write_cold_email(job, items),
+        }
+        outputs, letters = [], []
+        for stage, writer in writers.items():
+            stats, outputs = measure_stage(
+                stage,
+                lambda: [writer(job, items) for job, items in zip(jobs, portfolios)],
+                iterations,
+                len(jobs),
+            )
+            results.append({"page": name, **stats})
+            if stage == "write_letter":
+                letters = outputs
+                for _ in range(iterations * len(jobs)):
+                    template_reuse.stats.record_full(stats["p50_ms"] / 1000 / len(jobs))
+
+        # Template reuse: edit the letter just written for each job instead of writing a new one
+        def adapt_letters():
+            adapted = []
+            for job, items, base in zip(jobs, portfolios, letters):
+                template_reuse.stats.record_lookup()
+                start = time.perf_counter()
+                content = template_reuse.apply_edits(base, chain.edit_document(base, job, job, items))
+                elapsed = time.perf_counter() - start
+                if content is None:
+                    template_reuse.stats.record_failed(elapsed)
+                else:
+                    template_reuse.stats.record_adapted(elapsed)
+                adapted.append(content)
+            return adapted
+
+        stats, _ = measure_stage("adapt_letter", adapt_letters, iterations, len(jobs))
+        results.append({"page": name, **stats})
+
+        runs = itertools.count()
+
+        def persist():
+            # A distinct URL per run so every run inserts instead of hitting the dedup fast path
+            url = f"file://{name}.html?run={next(runs)}"
+            saved = db_ops.upsert_jobs(db, user_id, [{**job, "url": url} for job in jobs])
+            for (db_job, _), output in zip(saved, outputs):
+                db_ops.create_generated_document(db, db_job.id, "cold_email", output)
+
+        stats, _ = measure_stage("persist", persist, iterations, len(jobs))
+        results.append({"page": name, **stats})
+
+    db.close()
+    return results, {
+        "structured_data": structured_data.stats.summary(),
+        "template_reuse": template_reuse.stats.summary(),
+        "model_routing": model_routing.stats.summary(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmark with a fake LLM")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated seconds before the first token")
+    parser.add_argument("--token-rate", type=float, default=0.0, help="Simulated output tokens per second (0 = instant)")
+    parser.add_argument("--output-tokens", type=int, default=300, help="Tokens per generated document")
+    parser.add_argument("--pages", default="*", help="Glob of recorded page names to replay")
+    parser.add_argument("--draft-speedup", type=float, default=4.0,
+                        help="How much faster the simulated extraction draft model is")
+    parser.add_argument("--draft-failure-rate", type=float, default=0.2,
+                        help="Share of draft extractions returned truncated, forcing an escalation")
+    parser.add_argument("--output", help="Path of the JSON report")
+    args = parser.parse_args(argv)
+
+    from benchmarks.harness import write_report
+
+    results, summaries = run(
+        args.iterations, args.latency, args.token_rate, args.output_tokens, args.pages,
+        args.draft_speedup, args.draft_failure_rate,
+    )
+    print(f"Structured data fast path: {summaries['structured_data']}")
+    print(f"Template reuse fast path: {summaries['template_reuse']}")
+    print(f"Extraction model routing: {summaries['model_routing']}")
+    return write_report(
+        "pipeline",
+        results,
+        args.output,
+        extra=summaries,
+        iterations=args.iterations,
+        latency=args.latency,
+        token_rate=args.token_rate,
+        output_tokens=args.output_tokens,
+        draft_speedup=args.draft_speedup,
+        draft_failure_rate=args.draft_failure_rate,
+    )
+
+
+if __name__ == "__main__":
+    main()
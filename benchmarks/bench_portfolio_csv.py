@@ -0,0 +1,119 @@
+"""
+Memory benchmark for portfolio CSV uploads.
+
+Writes a synthetic CSV (1M rows by default), then imports it in a fresh
+interpreter per run, once by reading the whole file into a DataFrame
+before the bulk insert and once through portfolio_import's chunked
+reader. Peak RSS is reported above the interpreter's baseline after imports,
+so the two paths are compared on the memory the upload itself needs.
+
+Usage:
+    python -m benchmarks.bench_portfolio_csv --rows 1000000 --runs 1 --output bench_portfolio_csv.json
+"""
+import argparse
+import csv
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+MODES = ("full_read_csv", "chunked_import")
+
+_STACKS = ("Python, Django, PostgreSQL", "React, Node.js, MongoDB", "Go, Kubernetes, AWS", "Java, Spring, Kafka")
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Techstack", "Links"])
+        for i in range(rows):
+            writer.writerow([_STACKS[i % len(_STACKS)], f"https://example.com/project-{i}"])
+
+
+def _rss_kb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def child(mode, csv_path):
+    """Runs inside a fresh interpreter and prints its timings as JSON"""
+    import pandas as pd  # noqa: F401  imported up front so it counts towards the baseline
+    from database import SessionLocal, init_db
+    import db_operations as db_ops
+    from portfolio_import import import_portfolio_csv
+
+    init_db()
+    db = SessionLocal()
+    user_id = db_ops.create_user(db, "bench@example.com", "not-a-real-hash").id
+    baseline = _rss_kb()
+
+    start = time.perf_counter()
+    with open(csv_path, "rb") as f:
+        if mode == "full_read_csv":
+            # The previous upload path: the whole file as one DataFrame
+            frame = pd.read_csv(f)
+            rows = db_ops.replace_user_portfolio(db, user_id, zip(frame["Techstack"], frame["Links"]))
+        else:
+            rows = import_portfolio_csv(db, user_id, f, max_rows=None, max_bytes=None)["rows"]
+    elapsed = time.perf_counter() - start
+    db.close()
+
+    print(json.dumps({"rows": rows, "seconds": elapsed, "peak_kb": _rss_kb() - baseline}))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Peak memory of portfolio CSV uploads")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=1, help="Fresh interpreters per mode")
+    parser.add_argument("--output", help="Path of the JSON report")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--csv", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        return child(args.child, args.csv)
+
+    from benchmarks.harness import percentile, write_report
+
+    work_dir = tempfile.mkdtemp(prefix="bench_portfolio_")
+    csv_path = os.path.join(work_dir, "portfolio.csv")
+    write_csv(csv_path, args.rows)
+
+    results = []
+    for mode in MODES:
+        samples, peaks = [], []
+        for run in range(args.runs):
+            env = dict(os.environ)
+            env.setdefault("GROQ_API_KEY", "benchmark")
+            env["DATABASE_URL"] = f"sqlite:///{os.path.join(work_dir, f'{mode}_{run}.db')}"
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_portfolio_csv", "--child", mode, "--csv", csv_path],
+                cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+            )
+            timings = json.loads(proc.stdout.strip().splitlines()[-1])
+            samples.append(timings["seconds"])
+            peaks.append(timings["peak_kb"])
+        results.append({
+            "stage": mode,
+            "iterations": args.runs,
+            "p50_ms": round(percentile(samples, 50) * 1000, 3),
+            "p95_ms": round(percentile(samples, 95) * 1000, 3),
+            "throughput_per_s": round(args.rows * args.runs / sum(samples), 3),
+            "peak_memory_kb": max(peaks),
+        })
+
+    return write_report(
+        "portfolio_csv", results, args.output,
+        csv_bytes=os.path.getsize(csv_path), rows=args.rows, runs=args.runs,
+    )
+
+
+if __name__ == "__main__":
+    main()
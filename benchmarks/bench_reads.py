@@ -0,0 +1,126 @@
+"""
+Read path benchmark: ORM hydration versus the Core select() records in db_operations.
+
+Seeds a throwaway SQLite database with one user's jobs, documents and
+portfolio, then times the previous ORM queries against the current
+db_operations read functions. Throughput is reported in rows per second.
+
+Usage:
+    python -m benchmarks.bench_reads --jobs 5000 --documents 1000 --portfolio 5000 --iterations 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# Email lookups per timed call, since each returns a single row
+LOOKUPS_PER_CALL = 200
+
+
+def seed(db, jobs, documents, portfolio):
+    """Bulk insert one user's data and return (user email, user id, id of the job holding the documents)"""
+    from sqlalchemy import insert
+    from database import Job, GeneratedDocument, PortfolioItem
+    import db_operations as db_ops
+
+    user = db_ops.create_user(db, "bench@example.com", "not-a-real-hash")
+    now = datetime.utcnow()
+    db.execute(insert(Job), [
+        {"user_id": user.id, "url": f"https://example.com/jobs/{i}", "company": f"Company {i % 50}",
+         "role": f"Engineer {i}", "description": "Build things. " * 40, "experience": "3+ years",
+         "skills": "Python, SQL, AWS", "status": "active", "date_saved": now}
+        for i in range(jobs)
+    ])
+    job_id = db.execute(insert(Job).values(user_id=user.id, url="https://example.com/docs", company="Docs",
+                                           role="Writer", date_saved=now)).inserted_primary_key[0]
+    db.execute(insert(GeneratedDocument), [
+        {"job_id": job_id, "document_type": "cover_letter", "content": "Dear hiring manager, " * 100, "created_at": now}
+        for _ in range(documents)
+    ])
+    db.execute(insert(PortfolioItem), [
+        {"user_id": user.id, "tech_stack": "React, Node.js, MongoDB", "link": f"https://example.com/p/{i}",
+         "created_at": now}
+        for i in range(portfolio)
+    ])
+    db.commit()
+    return user.email, user.id, job_id
+
+
+def run(jobs, documents, portfolio, iterations):
+    db_dir = tempfile.mkdtemp(prefix="bench_reads_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(db_dir, 'bench.db')}"
+
+    from benchmarks.harness import measure_stage
+    from database import SessionLocal, init_db, User, Job, GeneratedDocument, PortfolioItem
+    from portfolio_cache import cache as portfolio_cache
+    import db_operations as db_ops
+
+    init_db()
+    db = SessionLocal()
+    email, user_id, job_id = seed(db, jobs, documents, portfolio)
+
+    # The ORM queries these functions used before, each against an empty identity map like a fresh rerun
+    def orm(query):
+        def call():
+            db.expunge_all()
+            return query()
+        return call
+
+    def uncached_portfolio():
+        portfolio_cache.invalidate(user_id)
+        return db_ops.get_user_portfolio(db, user_id)
+
+    stages = [
+        ("user_by_email", LOOKUPS_PER_CALL,
+         orm(lambda: [db.query(User).filter(User.email == email).first() for _ in range(LOOKUPS_PER_CALL)]),
+         lambda: [db_ops.get_user_by_email(db, email) for _ in range(LOOKUPS_PER_CALL)]),
+        ("user_jobs", jobs,
+         orm(lambda: db.query(Job).filter(Job.user_id == user_id).offset(0).limit(jobs).all()),
+         lambda: db_ops.get_user_jobs(db, user_id, limit=jobs)),
+        ("documents_by_job", documents,
+         orm(lambda: db.query(GeneratedDocument).filter(GeneratedDocument.job_id == job_id).all()),
+         lambda: db_ops.get_documents_by_job_id(db, job_id)),
+        ("user_portfolio", portfolio,
+         orm(lambda: db.query(PortfolioItem).filter(PortfolioItem.user_id == user_id).all()),
+         uncached_portfolio),
+    ]
+
+    results = []
+    for name, rows, orm_call, core_call in stages:
+        orm_stats, _ = measure_stage(f"orm_{name}", orm_call, iterations, rows)
+        core_stats, _ = measure_stage(f"core_{name}", core_call, iterations, rows)
+        speedup = round(core_stats["throughput_per_s"] / orm_stats["throughput_per_s"], 2)
+        results.extend([orm_stats, {**core_stats, "speedup": speedup}])
+
+    db.close()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ORM versus Core read path benchmark")
+    parser.add_argument("--jobs", type=int, default=5000)
+    parser.add_argument("--documents", type=int, default=1000)
+    parser.add_argument("--portfolio", type=int, default=5000)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--output", help="Path of the JSON report")
+    args = parser.parse_args(argv)
+
+    from benchmarks.harness import write_report
+
+    results = run(args.jobs, args.documents, args.portfolio, args.iterations)
+    for row in results:
+        if "speedup" in row:
+            print(f"{row['stage']}: {row['speedup']}x rows/s over the ORM")
+    return write_report(
+        "reads", results, args.output,
+        jobs=args.jobs, documents=args.documents, portfolio=args.portfolio, iterations=args.iterations,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Cold start and rerun benchmark for main.py.
+
+Each cold run starts a fresh interpreter with -X importtime and executes the
+app once through Streamlit's AppTest runner, so module imports, schema setup
+and the first render are all counted. The same child process then reruns the
+script, logged out and logged in, to measure per-rerun cost.
+
+Usage:
+    python -m benchmarks.bench_startup --runs 3 --reruns 10 --output bench_startup.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def child(reruns):
+    """Runs inside the profiled interpreter and prints its timings as JSON"""
+    start = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(os.path.join(ROOT, "main.py"), default_timeout=60)
+    app.run()
+    first_run = time.perf_counter() - start
+
+    def time_reruns():
+        samples = []
+        for _ in range(reruns):
+            rerun_start = time.perf_counter()
+            app.run()
+            samples.append(time.perf_counter() - rerun_start)
+        return samples
+
+    logged_out = time_reruns()
+    app.session_state["user_id"] = 1
+    logged_in = time_reruns()
+
+    print(json.dumps({"first_run": first_run, "logged_out": logged_out, "logged_in": logged_in}))
+
+
+def parse_importtime(stderr, top=10):
+    """Return total import time and the slowest top-level imports from -X importtime output"""
+    top_level = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        # Skip the header line
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        cumulative_us, name = int(fields[1]), fields[2]
+        # Top-level imports are not indented under another module
+        if not name.startswith("  "):
+            top_level.append((name.strip(), cumulative_us))
+    total_us = sum(us for _, us in top_level)
+    slowest = sorted(top_level, key=lambda item: item[1], reverse=True)[:top]
+    return total_us / 1000, [{"module": name, "cumulative_ms": round(us / 1000, 1)} for name, us in slowest]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold start and rerun benchmark for main.py")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to start")
+    parser.add_argument("--reruns", type=int, default=10, help="Script reruns per interpreter")
+    parser.add_argument("--output", help="Path of the JSON report")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        return child(args.reruns)
+
+    from benchmarks.harness import percentile, write_report
+
+    env = dict(os.environ)
+    env.setdefault("GROQ_API_KEY", "benchmark")
+    cold, first_runs, logged_out, logged_in, import_totals = [], [], [], [], []
+    slowest = []
+    for _ in range(args.runs):
+        # A fresh database per run so schema creation is part of every cold start
+        env["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench_startup_'), 'app.db')}"
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-m", "benchmarks.bench_startup", "--child", "--reruns", str(args.reruns)],
+            cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+        )
+        cold.append(time.perf_counter() - start)
+        timings = json.loads(proc.stdout.strip().splitlines()[-1])
+        first_runs.append(timings["first_run"])
+        logged_out.extend(timings["logged_out"])
+        logged_in.extend(timings["logged_in"])
+        import_total, slowest = parse_importtime(proc.stderr)
+        import_totals.append(import_total / 1000)
+
+    def stats(stage, samples):
+        return {
+            "stage": stage,
+            "p50_ms": round(percentile(samples, 50) * 1000, 3),
+            "p95_ms": round(percentile(samples, 95) * 1000, 3),
+            "throughput_per_s": round(len(samples) / sum(samples), 3) if sum(samples) else None,
+            "peak_memory_kb": None,
+        }
+
+    results = [
+        stats("process_cold_start", cold),
+        stats("import_time", import_totals),
+        stats("first_script_run", first_runs),
+        stats("rerun_logged_out", logged_out),
+        stats("rerun_logged_in", logged_in),
+    ]
+    for item in slowest:
+        print(f"  {item['cumulative_ms']:>9}ms  {item['module']}")
+    return write_report(
+        "startup", results, args.output, extra={"slowest_imports": slowest}, runs=args.runs, reruns=args.reruns
+    )
+
+
+if __name__ == "__main__":
+    main()
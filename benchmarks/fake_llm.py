@@ -0,0 +1,110 @@
+import hashlib
+import itertools
+import json
+import random
+import re
+import time
+from typing import Any, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+# Vocabulary used to build deterministic generated documents
+_WORDS = (
+    "experience team skills project delivered built designed scalable python react "
+    "data platform impact customers reliable cloud services collaborate improve "
+    "performance ownership engineering product growth passionate opportunity role"
+).split()
+
+# Counts extraction calls so simulated failures are evenly spaced and repeatable
+_extraction_calls = itertools.count()
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic stand-in for ChatGroq used by the offline benchmarks.
+    Simulates time-to-first-token latency and a fixed output token rate.
+    """
+
+    extraction_response: str = "[]"
+    latency: float = 0.0
+    tokens_per_second: float = 0.0
+    output_tokens: int = 300
+    model_name: str = "fake-chat"
+    # Share of extraction responses cut off mid-JSON, as a small draft model sometimes returns
+    extraction_failure_rate: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _respond(self, prompt: str) -> str:
+        # Extraction prompts get the recorded JSON for the page
+        if "### VALID JSON" in prompt:
+            call = next(_extraction_calls)
+            if int((call + 1) * self.extraction_failure_rate) > int(call * self.extraction_failure_rate):
+                return self.extraction_response[:len(self.extraction_response) // 2]
+            return self.extraction_response
+
+        # Edit prompts get a few find/replace edits against the base document
+        if "### EDITS JSON" in prompt:
+            return self._edit_response(prompt)
+
+        # Everything else gets pseudo-random prose seeded by the prompt
+        seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16], 16)
+        rng = random.Random(seed)
+        return " ".join(rng.choice(_WORDS) for _ in range(self.output_tokens))
+
+    def _edit_response(self, prompt: str) -> str:
+        base = prompt.split("### BASE DOCUMENT:", 1)[1].split("###", 1)[0].split()
+        rng = random.Random(len(prompt))
+        # Replace a handful of short phrases, as a targeted edit of company and skill mentions would
+        edits = []
+        for start in range(0, min(len(base), 200), 50):
+            phrase = " ".join(base[start:start + 3])
+            if phrase:
+                edits.append({"find": phrase, "replace": " ".join(rng.choice(_WORDS) for _ in range(3))})
+        return json.dumps(edits)
+
+    def _simulate_latency(self, content: str):
+        delay = self.latency
+        if self.tokens_per_second > 0:
+            delay += len(content.split()) / self.tokens_per_second
+        if delay > 0:
+            time.sleep(delay)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        prompt = "\n".join(str(message.content) for message in messages)
+        content = self._respond(prompt)
+        self._simulate_latency(content)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        prompt = "\n".join(str(message.content) for message in messages)
+        content = self._respond(prompt)
+        if self.latency > 0:
+            time.sleep(self.latency)
+        # One chunk per whitespace-delimited token, paced at the simulated output rate
+        for token in re.findall(r'\s*\S+', content):
+            if self.tokens_per_second > 0:
+                time.sleep(1 / self.tokens_per_second)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+
+def load_extraction_response(path):
+    """Read a recorded extraction result and return it as the raw model output"""
+    with open(path, encoding="utf-8") as f:
+        return json.dumps(json.load(f))
@@ -0,0 +1,84 @@
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime
+
+
+def percentile(samples, pct):
+    """Return the pct-th percentile of samples using nearest-rank"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def measure_stage(name, fn, iterations=5, items_per_call=1):
+    """
+    Time a stage over several iterations and capture its peak memory.
+    Latency is measured without tracemalloc; one extra traced call records peak memory.
+    Returns the stage statistics and the result of the last call.
+    """
+    samples = []
+    result = None
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    total = sum(samples)
+    stats = {
+        "stage": name,
+        "iterations": iterations,
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "throughput_per_s": round(iterations * items_per_call / total, 3) if total else None,
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+    return stats, result
+
+
+def git_revision():
+    """Return the current commit hash so reports can be compared between commits"""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def write_report(benchmark, results, output_path=None, extra=None, **params):
+    """Print a summary table and emit the results (plus any extra sections) as JSON"""
+    report = {
+        "benchmark": benchmark,
+        "commit": git_revision(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "params": params,
+        "results": results,
+        **(extra or {}),
+    }
+
+    for row in results:
+        print(f"{row.get('page', ''):<20} {row['stage']:<22} "
+              f"p50={row.get('p50_ms')}ms p95={row.get('p95_ms')}ms "
+              f"tput={row.get('throughput_per_s')}/s peak={row.get('peak_memory_kb')}KB")
+
+    if output_path:
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {output_path}")
+
+    return report
@@ -1,4 +1,5 @@
 import os
+import time
 from langchain_groq import ChatGroq
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
@@ -6,11 +7,21 @@ from langchain_core.exceptions import OutputParserException
 from dotenv import load_dotenv
 import streamlit as st
 
+import model_routing
+from json_stream import JsonObjectStream
+
 # Load environment variables
 load_dotenv()
 
 class Chain:
-    def __init__(self):
+    def __init__(self, llm=None, extract_llm=None):
+        # Allow pre-built chat models to be injected (e.g. the offline benchmark fakes)
+        # extract_llm is the small draft model tried first for extraction
+        if llm is not None:
+            self.llm = llm
+            self.extract_llm = extract_llm
+            return
+
         # Get API key from environment with more robust error handling
         groq_api_key = os.getenv("GROQ_API_KEY")
         
@@ -23,10 +34,29 @@ class Chain:
         self.llm = ChatGroq(
             temperature=0,
             groq_api_key=groq_api_key,
-            model_name="llama-3.3-70b-versatile"
+            model_name=model_routing.DEFAULT_MODEL
         )
+        
+        # Small model for drafting extractions; disabled when unset or the same as the default
+        self.extract_llm = None
+        if model_routing.EXTRACT_DRAFT_MODEL and model_routing.EXTRACT_DRAFT_MODEL != model_routing.DEFAULT_MODEL:
+            self.extract_llm = ChatGroq(
+                temperature=0,
+                groq_api_key=groq_api_key,
+                model_name=model_routing.EXTRACT_DRAFT_MODEL
+            )
 
     def extract_jobs(self, cleaned_text):
+        return list(self.stream_jobs(cleaned_text))
+
+    def stream_jobs(self, cleaned_text):
+        """
+        Extract job postings from page text, yielding each job as soon as its
+        JSON object is complete. With a draft model configured, the draft's
+        output is validated against the job schema first and only escalated to
+        the default model when it fails validation. Truncated output is
+        repaired, so jobs before the cut are kept.
+        """
         prompt_extract = PromptTemplate.from_template(
             """
             ### SCRAPED TEXT FROM WEBSITE:
@@ -39,16 +69,56 @@ class Chain:
             ### VALID JSON (NO PREAMBLE):
             """
         )
-        chain_extract = prompt_extract | self.llm
-        res = chain_extract.invoke(input={"page_data": cleaned_text})
+        prompt_text = prompt_extract.format(page_data=cleaned_text)
         
-        try:
-            json_parser = JsonOutputParser()
-            res = json_parser.parse(res.content)
-        except OutputParserException:
-            raise OutputParserException("Context too big. Unable to parse jobs.")
+        if self.extract_llm is not None:
+            # The draft is read whole, since it has to pass validation before any job is used
+            start = time.perf_counter()
+            try:
+                draft = self.extract_llm.invoke(prompt_text)
+            except Exception as e:
+                # Rate limits, oversized requests or a retired draft model fall through to the default model
+                draft, reason = None, f"draft error: {type(e).__name__}"
+            elapsed = time.perf_counter() - start
+            
+            if draft is not None:
+                stream = JsonObjectStream()
+                jobs = stream.feed(draft.content) + stream.close()
+                if stream.failed:
+                    reason = "invalid json"
+                elif stream.truncated:
+                    reason = "truncated output"
+                else:
+                    reason = model_routing.validate_jobs(jobs, cleaned_text)
+            
+            input_tokens, output_tokens = model_routing.token_usage(draft, prompt_text) if draft is not None else (0, 0)
+            model_routing.stats.record_draft(
+                elapsed,
+                model_routing.cost(model_routing.model_name(self.extract_llm), input_tokens, output_tokens),
+                model_routing.cost(model_routing.model_name(self.llm), input_tokens, output_tokens),
+                reason,
+            )
+            if reason is None:
+                yield from jobs
+                return
+        
+        start = time.perf_counter()
+        stream = JsonObjectStream()
+        res = None
+        for chunk in self.llm.stream(prompt_text):
+            res = chunk if res is None else res + chunk
+            yield from stream.feed(chunk.content)
+        # A job cut off by truncated output is only kept if at least its role made it
+        yield from (job for job in stream.close() if job.get("role"))
+        
+        input_tokens, output_tokens = model_routing.token_usage(res, prompt_text) if res is not None else (0, 0)
+        model_routing.stats.record_large(
+            time.perf_counter() - start,
+            model_routing.cost(model_routing.model_name(self.llm), input_tokens, output_tokens),
+        )
         
-        return res if isinstance(res, list) else [res]
+        if stream.failed:
+            raise OutputParserException("Context too big. Unable to parse jobs.")
 
     def write_letter(self, job, portfolio_items):
         # Format portfolio items for the prompt
@@ -154,4 +224,60 @@ class Chain:
             "portfolio_links": portfolio_text,
             "email_recipient": email_recipient
         })
-        return res.content
\ No newline at end of file
+        return res.content
+
+    def edit_document(self, base_document, base_job, job, portfolio_items, recipient=None):
+        """
+        Ask for the edits that adapt a document written for base_job to job.
+        Returns a list of {"find", "replace"} dicts; an empty list if the output can't be parsed.
+        """
+        portfolio_text = ""
+        for item in portfolio_items:
+            portfolio_text += f"- Tech stack: {item.get('techstack', '')}, Link: {item.get('links', '')}\n"
+
+        if not portfolio_text:
+            portfolio_text = "No specific portfolio items to highlight."
+
+        prompt_edit = PromptTemplate.from_template(
+            """
+            ### BASE DOCUMENT:
+            {base_document}
+
+            ### JOB THE BASE DOCUMENT WAS WRITTEN FOR:
+            {base_job}
+
+            ### NEW JOB DESCRIPTION:
+            {job_description}
+
+            ### PORTFOLIO INFORMATION:
+            Relevant projects/skills to highlight:
+            {portfolio_links}
+
+            ### RECIPIENT:
+            {email_recipient}
+
+            ### INSTRUCTION:
+            The base document was written for a similar job. Adapt it to the new job with as few edits as possible:
+            change the company, role, recipient, skills and project references that no longer fit, and leave everything else as is.
+            Return a JSON list of edits, each with the keys `find` (text copied exactly from the base document)
+            and `replace` (the text to put in its place). Every occurrence of `find` is replaced, and the result
+            must not mention the base job's company or role anywhere. Do not return the full document.
+            Only return the valid JSON.
+            ### EDITS JSON (NO PREAMBLE):
+            """
+        )
+        chain_edit = prompt_edit | self.llm
+        res = chain_edit.invoke({
+            "base_document": base_document,
+            "base_job": str(base_job),
+            "job_description": str(job),
+            "portfolio_links": portfolio_text,
+            "email_recipient": recipient or "the hiring manager"
+        })
+
+        try:
+            edits = JsonOutputParser().parse(res.content)
+        except OutputParserException:
+            return []
+
+        return edits if isinstance(edits, list) else [edits]
\ No newline at end of file
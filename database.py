@@ -1,6 +1,6 @@
 import os
 from datetime import datetime
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, ForeignKey, Boolean
+from sqlalchemy import create_engine, inspect, text, select, update, delete, or_, Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from dotenv import load_dotenv
@@ -36,29 +36,42 @@ class Job(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     url = Column(String(1024))
+    normalized_url = Column(String(1024))
+    fingerprint = Column(String(64))  # sha256 of normalized URL + role, company and description
     company = Column(String(255))
     role = Column(String(255))
     description = Column(Text)
     experience = Column(String(255))
     skills = Column(Text)  # Store as comma-separated values
+    content_hash = Column(String(64))  # sha256 of the cleaned page text when last scraped
+    chunk_hashes = Column(Text)  # JSON list of per-paragraph hashes, used to diff re-scrapes
+    last_checked = Column(DateTime)
+    status = Column(String(20), default="active")  # "active" or "dead" once the posting is gone
     date_saved = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
     user = relationship("User", back_populates="jobs")
     generated_documents = relationship("GeneratedDocument", back_populates="job")
 
+    __table_args__ = (
+        Index("ix_jobs_user_fingerprint", "user_id", "fingerprint", unique=True),
+        Index("ix_jobs_user_normalized_url", "user_id", "normalized_url"),
+    )
+
 
 class GeneratedDocument(Base):
     __tablename__ = "generated_documents"
 
     id = Column(Integer, primary_key=True, index=True)
     job_id = Column(Integer, ForeignKey("jobs.id"))
+    task_id = Column(Integer, ForeignKey("tasks.id"), nullable=True, index=True)
     document_type = Column(String(50))  # "cover_letter", "resume", "cold_email"
     content = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
     job = relationship("Job", back_populates="generated_documents")
+    task = relationship("Task", back_populates="generated_documents")
 
 
 class PortfolioItem(Base):
@@ -74,9 +87,98 @@ class PortfolioItem(Base):
     user = relationship("User", back_populates="portfolio_items")
 
 
+class Task(Base):
+    __tablename__ = "tasks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    root_id = Column(Integer, index=True)  # First task of the submission this task belongs to
+    parent_id = Column(Integer, ForeignKey("tasks.id"), nullable=True)
+    kind = Column(String(50))  # "fetch", "extract", "generate"
+    status = Column(String(20), default="pending", index=True)  # "pending", "running", "done", "failed"
+    payload = Column(Text)  # JSON input for the task
+    result = Column(Text)  # JSON output of the task
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    generated_documents = relationship("GeneratedDocument", back_populates="task")
+
+
 # Create all tables in the database
 def create_tables():
     Base.metadata.create_all(bind=engine)
+    add_missing_columns()
+    backfill_job_fingerprints()
+
+
+def add_missing_columns():
+    """
+    create_all only creates missing tables, so add any new nullable columns
+    and indexes to tables that already exist in older databases
+    """
+    inspector = inspect(engine)
+    existing_tables = inspector.get_table_names()
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing_columns = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+
+
+def backfill_job_fingerprints(batch_size=500):
+    """
+    Fill in normalized_url and fingerprint on jobs saved before they existed,
+    so upserts and the saved-URL lookup see them. Older databases saved the
+    same posting once per save; those duplicates are merged into the oldest
+    row, with their generated documents moved over, before the fingerprint
+    is written so the unique (user_id, fingerprint) index holds.
+    Returns the number of duplicate rows merged.
+    """
+    from utils import normalize_url, job_fingerprint
+
+    jobs = Job.__table__
+    merged = 0
+    last_id = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                select(jobs.c.id, jobs.c.user_id, jobs.c.url, jobs.c.role, jobs.c.company, jobs.c.description)
+                .where(jobs.c.id > last_id, or_(jobs.c.fingerprint == None, jobs.c.normalized_url == None))  # noqa: E711
+                .order_by(jobs.c.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                return merged
+            for row in rows:
+                fingerprint = job_fingerprint(row.url, row.role, row.company, row.description)
+                keeper = conn.execute(
+                    select(jobs.c.id).where(
+                        jobs.c.user_id == row.user_id, jobs.c.fingerprint == fingerprint, jobs.c.id != row.id
+                    )
+                ).scalar()
+                if keeper is None:
+                    conn.execute(
+                        update(jobs).where(jobs.c.id == row.id)
+                        .values(fingerprint=fingerprint, normalized_url=normalize_url(row.url))
+                    )
+                    continue
+                conn.execute(
+                    update(GeneratedDocument.__table__)
+                    .where(GeneratedDocument.job_id == row.id)
+                    .values(job_id=keeper)
+                )
+                conn.execute(delete(jobs).where(jobs.c.id == row.id))
+                merged += 1
+            last_id = rows[-1].id
 
 
 # Get a database session
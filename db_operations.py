@@ -1,9 +1,70 @@
+from sqlalchemy import insert, select, bindparam
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 import json
-from typing import List, Optional, Dict, Any
+from itertools import islice
+from typing import List, Optional, Dict, Any, Iterable, NamedTuple
 
-from database import User, Job, GeneratedDocument, PortfolioItem
+from database import User, Job, GeneratedDocument, PortfolioItem, Task
+from utils import normalize_url, job_fingerprint
+from portfolio_cache import cache as portfolio_cache, PortfolioEntry
+
+# Job columns that come from extraction
+JOB_FIELDS = ("role", "company", "experience", "skills", "description")
+
+
+# Read-only records returned by the hot read paths instead of ORM objects
+class UserRecord(NamedTuple):
+    id: int
+    email: str
+    hashed_password: str
+
+
+class JobSummary(NamedTuple):
+    id: int
+    url: str
+    company: str
+    role: str
+    status: Optional[str]
+    date_saved: Optional[datetime]
+
+
+class DocumentRecord(NamedTuple):
+    id: int
+    job_id: Optional[int]
+    document_type: str
+    content: str
+    created_at: Optional[datetime]
+
+
+# Core statements built once with bound parameters, so every call reuses the compiled SQL
+_users, _jobs = User.__table__, Job.__table__
+_documents, _portfolio = GeneratedDocument.__table__, PortfolioItem.__table__
+
+USER_BY_EMAIL = (
+    select(_users.c.id, _users.c.email, _users.c.hashed_password)
+    .where(_users.c.email == bindparam("email"))
+    .limit(1)
+)
+USER_JOBS = (
+    select(_jobs.c.id, _jobs.c.url, _jobs.c.company, _jobs.c.role, _jobs.c.status, _jobs.c.date_saved)
+    .where(_jobs.c.user_id == bindparam("user_id"))
+    .order_by(_jobs.c.id)
+    .offset(bindparam("skip"))
+    .limit(bindparam("limit"))
+)
+JOB_DOCUMENTS = (
+    select(_documents.c.id, _documents.c.job_id, _documents.c.document_type,
+           _documents.c.content, _documents.c.created_at)
+    .where(_documents.c.job_id == bindparam("job_id"))
+    .order_by(_documents.c.id)
+)
+USER_PORTFOLIO = (
+    select(_portfolio.c.id, _portfolio.c.user_id, _portfolio.c.tech_stack, _portfolio.c.link, _portfolio.c.created_at)
+    .where(_portfolio.c.user_id == bindparam("user_id"))
+    .order_by(_portfolio.c.id)
+)
 
 # User operations
 def create_user(db: Session, email: str, hashed_password: str):
@@ -15,7 +76,8 @@ def create_user(db: Session, email: str, hashed_password: str):
 
 
 def get_user_by_email(db: Session, email: str):
-    return db.query(User).filter(User.email == email).first()
+    row = db.execute(USER_BY_EMAIL, {"email": email}).first()
+    return UserRecord._make(row) if row else None
 
 
 def get_user_by_id(db: Session, user_id: int):
@@ -23,30 +85,220 @@ def get_user_by_id(db: Session, user_id: int):
 
 
 # Job operations
-def create_job(db: Session, user_id: int, job_data: Dict[str, Any]):
+def _build_job(user_id: int, job_data: Dict[str, Any]):
     # Convert skills list to comma-separated string if it's a list
     skills = job_data.get("skills", [])
     if isinstance(skills, list):
         skills = ", ".join(skills)
     
-    db_job = Job(
+    url = job_data.get("url", "")
+    company = job_data.get("company", "Unknown Company")
+    role = job_data.get("role", "Unknown Role")
+    description = job_data.get("description", "")
+    
+    return Job(
         user_id=user_id,
-        url=job_data.get("url", ""),
-        company=job_data.get("company", "Unknown Company"),
-        role=job_data.get("role", "Unknown Role"),
-        description=job_data.get("description", ""),
+        url=url,
+        normalized_url=normalize_url(url),
+        fingerprint=job_fingerprint(url, role, company, description),
+        company=company,
+        role=role,
+        description=description,
         experience=job_data.get("experience", ""),
         skills=skills,
+        content_hash=job_data.get("content_hash"),
+        chunk_hashes=json.dumps(job_data["chunk_hashes"]) if job_data.get("chunk_hashes") else None,
         date_saved=datetime.utcnow()
     )
+
+
+def create_job(db: Session, user_id: int, job_data: Dict[str, Any]):
+    db_job = _build_job(user_id, job_data)
     db.add(db_job)
     db.commit()
     db.refresh(db_job)
     return db_job
 
 
+def _fingerprint_of(job_data: Dict[str, Any]):
+    return job_fingerprint(
+        job_data.get("url", ""),
+        job_data.get("role", "Unknown Role"),
+        job_data.get("company", "Unknown Company"),
+        job_data.get("description", "")
+    )
+
+
+def upsert_job(db: Session, user_id: int, job_data: Dict[str, Any]):
+    """
+    Save a job unless the user already saved the same posting.
+    Returns (job, created) where created is False when an existing row was reused.
+    """
+    fingerprint = _fingerprint_of(job_data)
+    existing = get_job_by_fingerprint(db, user_id, fingerprint)
+    if existing:
+        return existing, False
+    
+    try:
+        return create_job(db, user_id, job_data), True
+    except IntegrityError:
+        # Another session saved the same posting between the lookup and the insert
+        db.rollback()
+        return get_job_by_fingerprint(db, user_id, fingerprint), False
+
+
+def upsert_jobs(db: Session, user_id: int, jobs_data: List[Dict[str, Any]], commit: bool = True):
+    """
+    Batch version of upsert_job: one lookup for already saved postings and a
+    single flush for the new ones. Pass commit=False to add further writes to
+    the same transaction. Returns (job, created) pairs in input order.
+    """
+    fingerprints = [_fingerprint_of(job_data) for job_data in jobs_data]
+    saved = {
+        job.fingerprint: job
+        for job in db.query(Job).filter(Job.user_id == user_id, Job.fingerprint.in_(set(fingerprints)))
+    }
+    
+    results = []
+    for fingerprint, job_data in zip(fingerprints, jobs_data):
+        if fingerprint in saved:
+            results.append((saved[fingerprint], False))
+            continue
+        # The same posting twice in one batch is saved once
+        db_job = _build_job(user_id, job_data)
+        db.add(db_job)
+        saved[fingerprint] = db_job
+        results.append((db_job, True))
+    
+    try:
+        db.flush()
+    except IntegrityError:
+        # Another session saved one of these postings since the lookup
+        db.rollback()
+        return [upsert_job(db, user_id, job_data) for job_data in jobs_data]
+    
+    if commit:
+        db.commit()
+    return results
+
+
+def get_job_by_fingerprint(db: Session, user_id: int, fingerprint: str):
+    return db.query(Job).filter(Job.user_id == user_id, Job.fingerprint == fingerprint).first()
+
+
+def get_jobs_by_url(db: Session, user_id: int, url: str):
+    """Return the user's saved jobs for a posting URL, matched on its normalized form"""
+    return db.query(Job).filter(Job.user_id == user_id, Job.normalized_url == normalize_url(url)).all()
+
+
+def job_to_dict(job: Job):
+    """Rebuild the extraction dict for a saved job"""
+    return {
+        "role": job.role,
+        "company": job.company,
+        "experience": job.experience,
+        "skills": [skill.strip() for skill in (job.skills or "").split(",") if skill.strip()],
+        "description": job.description,
+    }
+
+
+def _job_update_mapping(job: Job, updates: Dict[str, Any]):
+    """Column values for a job's updates, with the fingerprint recomputed when extracted fields change"""
+    mapping = {"id": job.id}
+    for field, value in updates.items():
+        if field == "skills" and isinstance(value, list):
+            value = ", ".join(value)
+        elif field == "chunk_hashes" and isinstance(value, list):
+            value = json.dumps(value)
+        mapping[field] = value
+    if any(field in updates for field in JOB_FIELDS):
+        merged = {field: mapping.get(field, getattr(job, field)) for field in ("role", "company", "description")}
+        mapping["fingerprint"] = job_fingerprint(job.url, merged["role"], merged["company"], merged["description"])
+    return mapping
+
+
+def _update_or_merge(db: Session, job: Job, mapping: Dict[str, Any]):
+    """
+    Write one job's mapping. When its new fingerprint is already held by
+    another of the user's jobs, the two are the same posting: the job's
+    documents and fresh values move to that row and the job is deleted.
+    Returns the row that holds the update, or None if it couldn't be written.
+    """
+    user_id = job.user_id
+    keeper = None
+    if mapping.get("fingerprint"):
+        keeper = db.query(Job).filter(
+            Job.user_id == user_id, Job.fingerprint == mapping["fingerprint"], Job.id != job.id
+        ).first()
+    
+    if keeper is None:
+        db.bulk_update_mappings(Job, [mapping])
+        saved = job
+    else:
+        db.query(GeneratedDocument).filter(GeneratedDocument.job_id == job.id).update(
+            {"job_id": keeper.id}, synchronize_session=False
+        )
+        for field, value in mapping.items():
+            if field not in ("id", "fingerprint"):
+                setattr(keeper, field, value)
+        db.query(Job).filter(Job.id == job.id).delete(synchronize_session=False)
+        db.expunge(job)
+        saved = keeper
+    
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another session took the fingerprint since the lookup; leave this job for the next check
+        db.rollback()
+        return None
+    return saved
+
+
+def update_job(db: Session, job: Job, updates: Dict[str, Any]):
+    """
+    Apply field updates to a saved job, keeping its fingerprint in sync.
+    Returns the updated job, the saved copy of the same posting it was merged
+    into, or None when the write collided and was skipped.
+    """
+    return _update_or_merge(db, job, _job_update_mapping(job, updates))
+
+
+def bulk_update_jobs(db: Session, job_updates: List[Any]):
+    """
+    Write (job, updates) pairs in a single transaction.
+    Fingerprints are recomputed from the merged values when extracted fields change.
+    If that makes a job collide with another saved copy of the same posting,
+    the batch is rewritten job by job, merging each collision, so one
+    duplicate doesn't fail the whole batch. Returns the number of jobs written.
+    """
+    mappings = [(job, _job_update_mapping(job, updates)) for job, updates in job_updates]
+    if not mappings:
+        return 0
+    
+    try:
+        db.bulk_update_mappings(Job, [mapping for _, mapping in mappings])
+        db.commit()
+        return len(mappings)
+    except IntegrityError:
+        db.rollback()
+    return sum(1 for job, mapping in mappings if _update_or_merge(db, job, mapping) is not None)
+
+
+def get_jobs_after(db: Session, last_id: int, limit: int, user_id: Optional[int] = None,
+                   checked_before: Optional[datetime] = None):
+    """Keyset-paginated page of saved jobs with id > last_id, for walking the whole table in batches"""
+    query = db.query(Job).filter(Job.id > last_id)
+    if user_id is not None:
+        query = query.filter(Job.user_id == user_id)
+    if checked_before is not None:
+        query = query.filter((Job.last_checked == None) | (Job.last_checked < checked_before))  # noqa: E711
+    return query.order_by(Job.id).limit(limit).all()
+
+
 def get_user_jobs(db: Session, user_id: int, skip: int = 0, limit: int = 100):
-    return db.query(Job).filter(Job.user_id == user_id).offset(skip).limit(limit).all()
+    """The columns the saved jobs list shows, as JobSummary records"""
+    rows = db.execute(USER_JOBS, {"user_id": user_id, "skip": skip, "limit": limit})
+    return [JobSummary._make(row) for row in rows]
 
 
 def get_job_by_id(db: Session, job_id: int):
@@ -63,9 +315,11 @@ def delete_job(db: Session, job_id: int):
 
 
 # Generated document operations
-def create_generated_document(db: Session, job_id: int, document_type: str, content: str):
+def create_generated_document(db: Session, job_id: Optional[int], document_type: str, content: str,
+                              task_id: Optional[int] = None):
     db_document = GeneratedDocument(
         job_id=job_id,
+        task_id=task_id,
         document_type=document_type,
         content=content,
         created_at=datetime.utcnow()
@@ -77,13 +331,141 @@ def create_generated_document(db: Session, job_id: int, document_type: str, cont
 
 
 def get_documents_by_job_id(db: Session, job_id: int):
-    return db.query(GeneratedDocument).filter(GeneratedDocument.job_id == job_id).all()
+    return [DocumentRecord._make(row) for row in db.execute(JOB_DOCUMENTS, {"job_id": job_id})]
 
 
 def get_document_by_id(db: Session, document_id: int):
     return db.query(GeneratedDocument).filter(GeneratedDocument.id == document_id).first()
 
 
+def get_documents_by_task_ids(db: Session, task_ids: List[int]):
+    if not task_ids:
+        return []
+    return db.query(GeneratedDocument).filter(GeneratedDocument.task_id.in_(task_ids)).all()
+
+
+def get_recent_user_documents(db: Session, user_id: int, document_type: str, limit: int = 50):
+    """
+    A user's most recent documents of one type, each with the saved job and the
+    generating task it came from (either may be None)
+    """
+    return (
+        db.query(GeneratedDocument, Job, Task)
+        .outerjoin(Job, GeneratedDocument.job_id == Job.id)
+        .outerjoin(Task, GeneratedDocument.task_id == Task.id)
+        .filter(GeneratedDocument.document_type == document_type)
+        .filter((Job.user_id == user_id) | (Task.user_id == user_id))
+        .order_by(GeneratedDocument.id.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+# Task queue operations
+def create_task(db: Session, user_id: int, kind: str, payload: Dict[str, Any],
+                root_id: Optional[int] = None, parent_id: Optional[int] = None):
+    db_task = Task(
+        user_id=user_id,
+        root_id=root_id,
+        parent_id=parent_id,
+        kind=kind,
+        status="pending",
+        payload=json.dumps(payload),
+        created_at=datetime.utcnow(),
+        updated_at=datetime.utcnow()
+    )
+    db.add(db_task)
+    db.flush()
+    # A task without a root starts a new submission and is its own root
+    if db_task.root_id is None:
+        db_task.root_id = db_task.id
+    db.commit()
+    db.refresh(db_task)
+    return db_task
+
+
+def create_child_tasks(db: Session, parent: Task, kind: str, payloads: List[Dict[str, Any]], commit: bool = True):
+    """Add one child task per payload with a single flush. Returns the new tasks."""
+    now = datetime.utcnow()
+    tasks = [
+        Task(
+            user_id=parent.user_id,
+            root_id=parent.root_id,
+            parent_id=parent.id,
+            kind=kind,
+            status="pending",
+            payload=json.dumps(payload),
+            created_at=now,
+            updated_at=now
+        )
+        for payload in payloads
+    ]
+    db.add_all(tasks)
+    db.flush()
+    if commit:
+        db.commit()
+    return tasks
+
+
+def get_task_by_id(db: Session, task_id: int):
+    return db.query(Task).filter(Task.id == task_id).first()
+
+
+def get_tasks_by_root(db: Session, root_id: int):
+    return db.query(Task).filter(Task.root_id == root_id).order_by(Task.id).all()
+
+
+def count_child_tasks(db: Session, parent_id: int):
+    return db.query(Task).filter(Task.parent_id == parent_id).count()
+
+
+def get_unfinished_tasks(db: Session):
+    return db.query(Task).filter(Task.status.in_(["pending", "running"])).order_by(Task.id).all()
+
+
+def claim_task(db: Session, task_id: int):
+    """
+    Atomically move a task from pending to running.
+    Returns the task if this caller claimed it, None if another worker already did.
+    """
+    claimed = db.query(Task).filter(Task.id == task_id, Task.status == "pending").update(
+        {"status": "running", "updated_at": datetime.utcnow()},
+        synchronize_session=False
+    )
+    db.commit()
+    if not claimed:
+        return None
+    return get_task_by_id(db, task_id)
+
+
+def finish_task(db: Session, task: Task, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+    task.status = "failed" if error else "done"
+    task.result = json.dumps(result) if result is not None else None
+    task.error = error
+    task.updated_at = datetime.utcnow()
+    db.commit()
+    return task
+
+
+def update_task_progress(db: Session, task_id: int, progress: Dict[str, Any]):
+    """Store interim progress of a running task in its result column"""
+    db.query(Task).filter(Task.id == task_id).update(
+        {"result": json.dumps(progress), "updated_at": datetime.utcnow()},
+        synchronize_session=False
+    )
+    db.commit()
+
+
+def requeue_running_tasks(db: Session):
+    """Reset tasks left running by a worker process that died back to pending"""
+    count = db.query(Task).filter(Task.status == "running").update(
+        {"status": "pending", "updated_at": datetime.utcnow()},
+        synchronize_session=False
+    )
+    db.commit()
+    return count
+
+
 # Portfolio operations
 def create_portfolio_item(db: Session, user_id: int, tech_stack: str, link: str):
     db_item = PortfolioItem(
@@ -95,18 +477,57 @@ def create_portfolio_item(db: Session, user_id: int, tech_stack: str, link: str)
     db.add(db_item)
     db.commit()
     db.refresh(db_item)
+    portfolio_cache.invalidate(user_id)
     return db_item
 
 
+def replace_user_portfolio(db: Session, user_id: int, items: Iterable[Any], batch_size: int = 5000):
+    """
+    Swap a user's whole portfolio for (tech_stack, link) pairs in one transaction.
+    items may be a generator; rows are inserted batch_size at a time without
+    building ORM objects, and nothing is kept if it raises part way through.
+    Returns the number of rows inserted.
+    """
+    now = datetime.utcnow()
+    inserted = 0
+    items = iter(items)
+    try:
+        db.query(PortfolioItem).filter(PortfolioItem.user_id == user_id).delete(synchronize_session=False)
+        while True:
+            batch = [
+                {"user_id": user_id, "tech_stack": tech_stack, "link": link, "created_at": now}
+                for tech_stack, link in islice(items, batch_size)
+            ]
+            if not batch:
+                break
+            db.execute(insert(PortfolioItem), batch)
+            inserted += len(batch)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    portfolio_cache.invalidate(user_id)
+    return inserted
+
+
 def get_user_portfolio(db: Session, user_id: int):
-    return db.query(PortfolioItem).filter(PortfolioItem.user_id == user_id).all()
+    """
+    The user's portfolio as read-only PortfolioEntry records, served from the
+    in-process snapshot cache until one of the write functions above changes it
+    """
+    def load():
+        return [PortfolioEntry(*row) for row in db.execute(USER_PORTFOLIO, {"user_id": user_id})]
+    
+    return portfolio_cache.get(user_id, load)
 
 
 def delete_portfolio_item(db: Session, item_id: int):
     item = db.query(PortfolioItem).filter(PortfolioItem.id == item_id).first()
     if item:
+        user_id = item.user_id
         db.delete(item)
         db.commit()
+        portfolio_cache.invalidate(user_id)
         return True
     return False
 
@@ -114,9 +535,9 @@ def delete_portfolio_item(db: Session, item_id: int):
 def query_portfolio_by_skills(db: Session, user_id: int, skills: List[str], limit: int = 3):
     """
     Find portfolio items that match the given skills
-    Using simple string matching
+    Using simple string matching against the cached portfolio snapshot
     """
-    portfolio_items = db.query(PortfolioItem).filter(PortfolioItem.user_id == user_id).all()
+    portfolio_items = get_user_portfolio(db, user_id)
     
     # Convert skills to lowercase for case-insensitive matching
     lowercase_skills = [skill.lower() for skill in skills if isinstance(skill, str)]
@@ -124,13 +545,7 @@ def query_portfolio_by_skills(db: Session, user_id: int, skills: List[str], limi
     # Calculate relevance score for each portfolio item
     scored_items = []
     for item in portfolio_items:
-        score = 0
-        tech_stack_lower = item.tech_stack.lower()
-        
-        for skill in lowercase_skills:
-            if skill in tech_stack_lower:
-                score += 1
-                
+        score = sum(1 for skill in lowercase_skills if item.matches(skill))
         if score > 0:
             scored_items.append((item, score))
     
@@ -138,4 +553,4 @@ def query_portfolio_by_skills(db: Session, user_id: int, skills: List[str], limi
     scored_items.sort(key=lambda x: x[1], reverse=True)
     
     # Return the top N most relevant items
-    return [item for item, score in scored_items[:limit]]
\ No newline at end of file
+    return [item for item, score in scored_items[:limit]]
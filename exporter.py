@@ -0,0 +1,189 @@
+import importlib.util
+import json
+import os
+import zipfile
+
+from sqlalchemy import select, func, or_
+
+from database import Job, GeneratedDocument, Task
+
+# Where finished exports are written, one sub-directory per user
+EXPORT_DIR = os.getenv("EXPORT_DIR", "exports")
+
+# Rows fetched per keyset page, and per Parquet row group
+EXPORT_BATCH_SIZE = 500
+
+JOB_COLUMNS = (Job.id, Job.url, Job.company, Job.role, Job.experience, Job.skills, Job.description,
+               Job.status, Job.date_saved)
+DOCUMENT_COLUMNS = (GeneratedDocument.id, GeneratedDocument.job_id, GeneratedDocument.document_type,
+                    GeneratedDocument.content, GeneratedDocument.created_at)
+
+# Flat schema shared by job and document rows in JSONL and Parquet exports
+RECORD_FIELDS = ("record_type", "id", "job_id", "url", "company", "role", "experience", "skills",
+                 "description", "status", "document_type", "content", "created_at")
+
+
+def available_formats():
+    """Export formats usable in this environment; Parquet needs the optional pyarrow package"""
+    formats = ["zip", "jsonl"]
+    if importlib.util.find_spec("pyarrow") is not None:
+        formats.append("parquet")
+    return formats
+
+
+def export_path(user_id, export_id, fmt):
+    return os.path.join(EXPORT_DIR, str(user_id), f"export_{export_id}.{fmt}")
+
+
+def _user_jobs_query(user_id):
+    return select(*JOB_COLUMNS).where(Job.user_id == user_id).order_by(Job.id)
+
+
+def _user_documents_query(user_id):
+    # Documents belong to the user through a saved job, or through the task that generated them
+    return (
+        select(*DOCUMENT_COLUMNS)
+        .outerjoin(Job, GeneratedDocument.job_id == Job.id)
+        .outerjoin(Task, GeneratedDocument.task_id == Task.id)
+        .where(or_(Job.user_id == user_id, Task.user_id == user_id))
+        .order_by(GeneratedDocument.id)
+    )
+
+
+def count_user_rows(db, user_id):
+    jobs = db.execute(select(func.count()).select_from(_user_jobs_query(user_id).subquery())).scalar()
+    documents = db.execute(select(func.count()).select_from(_user_documents_query(user_id).subquery())).scalar()
+    return jobs + documents
+
+
+def _stream(db, query, key):
+    """
+    Yield rows in keyset pages of EXPORT_BATCH_SIZE, ordered by key. Each page
+    is fetched in full, so no cursor is left open between pages and progress
+    can be committed while the export runs; an open SQLite reader would hold
+    the database lock until the last row.
+    """
+    last_id = 0
+    while True:
+        rows = db.execute(query.where(key > last_id).limit(EXPORT_BATCH_SIZE)).all()
+        if not rows:
+            return
+        yield from rows
+        last_id = rows[-1].id
+
+
+def iter_records(db, user_id):
+    """Every job and document of a user as flat dicts, streamed from the database"""
+    for row in _stream(db, _user_jobs_query(user_id), Job.id):
+        yield {
+            "record_type": "job",
+            "id": row.id,
+            "url": row.url,
+            "company": row.company,
+            "role": row.role,
+            "experience": row.experience,
+            "skills": row.skills,
+            "description": row.description,
+            "status": row.status or "active",
+            "created_at": row.date_saved.isoformat() if row.date_saved else None,
+        }
+    for row in _stream(db, _user_documents_query(user_id), GeneratedDocument.id):
+        yield {
+            "record_type": "document",
+            "id": row.id,
+            "job_id": row.job_id,
+            "document_type": row.document_type,
+            "content": row.content,
+            "created_at": row.created_at.isoformat() if row.created_at else None,
+        }
+
+
+def _write_jsonl(records, path, progress):
+    with open(path, "w", encoding="utf-8") as f:
+        for written, record in enumerate(records, 1):
+            f.write(json.dumps({field: record.get(field) for field in RECORD_FIELDS}) + "\n")
+            progress(written)
+
+
+def _write_zip(records, path, progress):
+    """
+    Compressed jobs.jsonl and documents.jsonl entries. A single entry per record
+    type keeps the zip's central directory (held in memory until close) constant size.
+    """
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        entry, entry_type = None, None
+        try:
+            for written, record in enumerate(records, 1):
+                # Records arrive grouped by type, and zipfile allows one open entry at a time
+                if record["record_type"] != entry_type:
+                    if entry is not None:
+                        entry.close()
+                    entry_type = record["record_type"]
+                    entry = archive.open(f"{entry_type}s.jsonl", "w")
+                entry.write((json.dumps(record) + "\n").encode("utf-8"))
+                progress(written)
+        finally:
+            if entry is not None:
+                entry.close()
+
+
+def _write_parquet(records, path, progress):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet export requires the pyarrow package (pip install pyarrow)") from e
+
+    schema = pa.schema([
+        (field, pa.int64() if field in ("id", "job_id") else pa.string()) for field in RECORD_FIELDS
+    ])
+    written = 0
+    batch = []
+    with pq.ParquetWriter(path, schema) as writer:
+        for record in records:
+            batch.append(record)
+            if len(batch) >= EXPORT_BATCH_SIZE:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                written += len(batch)
+                batch = []
+                progress(written)
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            progress(written + len(batch))
+
+
+WRITERS = {
+    "zip": _write_zip,
+    "jsonl": _write_jsonl,
+    "parquet": _write_parquet,
+}
+
+
+def export_user_data(db, user_id, fmt, path, progress=None):
+    """
+    Stream all of a user's saved jobs and generated documents into a file.
+    Rows are read in keyset pages and written as they arrive, so
+    memory use doesn't grow with the size of the history. The file is written
+    under a temporary name and renamed once complete.
+    Returns the number of records written.
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    written = 0
+
+    def track(count):
+        nonlocal written
+        written = count
+        if progress:
+            progress(count)
+
+    partial_path = path + ".partial"
+    try:
+        WRITERS[fmt](iter_records(db, user_id), partial_path, track)
+        os.replace(partial_path, path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+    return written
@@ -0,0 +1,305 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from urllib.parse import urlparse
+
+from utils import WORKDAY_HOSTS
+
+# Request settings for the cheap static HTTP path
+REQUEST_TIMEOUT_SECONDS = 20
+USER_AGENT = os.getenv("USER_AGENT", "Mozilla/5.0 (compatible; JobApplicationGenerator/1.0)")
+
+# Headless browser pool settings
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+PAGE_RENDER_TIMEOUT_SECONDS = int(os.getenv("PAGE_RENDER_TIMEOUT_SECONDS", "30"))
+MAX_PAGES_PER_BROWSER = 50  # Recycle browsers periodically so leaks don't accumulate
+
+# Cap on waiting for a loaded page's app to render the posting, and how long its text
+# must stay unchanged to count as rendered when it never reaches MIN_STATIC_WORDS
+PAGE_READY_TIMEOUT_SECONDS = float(os.getenv("PAGE_READY_TIMEOUT_SECONDS", "10"))
+TEXT_SETTLE_SECONDS = 1.0
+READY_POLL_SECONDS = 0.25
+
+# Elements that only appear once a career site has rendered the posting body
+READY_SELECTORS = (
+    '[data-automation-id="jobPostingDescription"]',  # Workday
+    ".iCIMS_JobContent",  # iCIMS
+)
+
+# Visible text of the page and whether a READY_SELECTORS element is present
+PAGE_STATE_SCRIPT = """
+return [
+    document.body ? document.body.innerText : '',
+    arguments[0].some(function (selector) { return document.querySelector(selector) !== null; })
+];
+"""
+
+# Career sites that render postings client-side
+JS_RENDERED_HOSTS = WORKDAY_HOSTS + (
+    "icims.com",
+    "successfactors.com",
+    "taleo.net",
+)
+
+# Statuses a known client-side host returns for a removed posting before any rendering
+GONE_STATUS_CODES = {404, 410}
+
+# Text career sites render in place of a removed posting, matched on short pages only
+NOT_FOUND_MARKERS = (
+    "the page you are looking for doesn't exist",
+    "the page you are looking for does not exist",
+    "this job posting is no longer available",
+    "this job is no longer available",
+    "job posting not found",
+    "job not found",
+    "no longer accepting applications",
+    "position has been filled",
+)
+
+# Markup left behind by single-page apps before their scripts run
+SPA_MARKERS = (
+    'id="root"',
+    'id="app"',
+    'id="__next"',
+    "ng-app",
+    "data-reactroot",
+    "enable javascript",
+)
+
+# Pages with fewer words than this are treated as empty shells
+MIN_STATIC_WORDS = 150
+
+# Resources the browser never needs to fetch to read a job posting
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.mp4", "*.webm",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*hotjar.com*", "*segment.io*", "*segment.com*",
+    "*newrelic.com*", "*nr-data.net*", "*optimizely.com*",
+]
+
+
+def page_ready_check(settle_seconds=TEXT_SETTLE_SECONDS):
+    """
+    WebDriverWait condition for a rendered posting: a known posting element is
+    present, the text reaches MIN_STATIC_WORDS, or non-empty text has stopped
+    changing for settle_seconds (a short or expired posting that is done rendering)
+    """
+    last_text, stable_since = None, None
+
+    def ready(driver):
+        nonlocal last_text, stable_since
+        text, has_posting = driver.execute_script(PAGE_STATE_SCRIPT, list(READY_SELECTORS))
+        text = text or ""
+        if has_posting or len(text.split()) >= MIN_STATIC_WORDS:
+            return True
+        now = time.monotonic()
+        if text != last_text or not text.strip():
+            last_text, stable_since = text, now
+            return False
+        return now - stable_since >= settle_seconds
+
+    return ready
+
+
+def html_to_text(html):
+    """Extract visible text the same way WebBaseLoader does"""
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html, "html.parser").get_text()
+
+
+def is_js_rendered_host(url):
+    """Known career sites whose postings are always rendered client-side"""
+    host = urlparse(url).netloc.lower()
+    return any(host == known or host.endswith("." + known) for known in JS_RENDERED_HOSTS)
+
+
+def needs_js_rendering(url, html, text):
+    """Decide whether a statically fetched page is an unrendered JavaScript shell"""
+    if is_js_rendered_host(url):
+        return True
+
+    if len(text.split()) >= MIN_STATIC_WORDS:
+        return False
+
+    html_lower = html.lower()
+    return "<script" in html_lower and any(marker in html_lower for marker in SPA_MARKERS)
+
+
+class BrowserPool:
+    """
+    Pool of warm, reused headless Chrome instances.
+    At most max_browsers pages render at once; idle browsers are kept for the next page.
+    """
+
+    def __init__(self, max_browsers=BROWSER_POOL_SIZE, page_timeout=PAGE_RENDER_TIMEOUT_SECONDS,
+                 ready_timeout=PAGE_READY_TIMEOUT_SECONDS):
+        self.max_browsers = max_browsers
+        self.page_timeout = page_timeout
+        self.ready_timeout = ready_timeout
+        self._slots = threading.BoundedSemaphore(max_browsers)
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self.pages_rendered = 0
+        self.total_render_seconds = 0.0
+
+    def _create_driver(self):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from webdriver_manager.chrome import ChromeDriverManager
+
+        options = webdriver.ChromeOptions()
+        options.add_argument("--headless=new")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--disable-extensions")
+        options.add_argument(f"--user-agent={USER_AGENT}")
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.managed_default_content_settings.fonts": 2,
+        })
+        # Only wait for the DOM; the posting text is checked for explicitly
+        options.page_load_strategy = "eager"
+
+        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+        driver.set_page_load_timeout(self.page_timeout)
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+        driver.pages_served = 0
+        return driver
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._create_driver()
+
+    def _release(self, driver, healthy):
+        driver.pages_served += 1
+        if healthy and driver.pages_served < MAX_PAGES_PER_BROWSER:
+            self._idle.put(driver)
+        else:
+            self._quit(driver)
+
+    def _quit(self, driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def render(self, url):
+        """Render a page in a pooled browser and return (html, render_seconds)"""
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        with self._slots:
+            driver = self._acquire()
+            start = time.perf_counter()
+            try:
+                driver.get(url)
+                try:
+                    # Wait until the app has rendered the posting, or its text has settled
+                    WebDriverWait(driver, self.ready_timeout, poll_frequency=READY_POLL_SECONDS).until(
+                        page_ready_check()
+                    )
+                except TimeoutException:
+                    # Still changing at the cap; keep whatever rendered
+                    pass
+                html = driver.page_source
+            except Exception:
+                # A failed page load can leave the browser in a bad state, so don't reuse it
+                self._release(driver, healthy=False)
+                raise
+            render_seconds = time.perf_counter() - start
+            self._release(driver, healthy=True)
+
+        with self._lock:
+            self.pages_rendered += 1
+            self.total_render_seconds += render_seconds
+        return html, render_seconds
+
+    def close(self):
+        while True:
+            try:
+                self._quit(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+_browser_pool = None
+_browser_pool_lock = threading.Lock()
+
+
+def get_browser_pool():
+    """Process-wide browser pool, started on the first JS-rendered page"""
+    global _browser_pool
+    with _browser_pool_lock:
+        if _browser_pool is None:
+            _browser_pool = BrowserPool()
+            atexit.register(_browser_pool.close)
+        return _browser_pool
+
+
+def is_not_found_page(text):
+    """Whether rendered text is a career site's "posting not found" page rather than a posting"""
+    text = ' '.join((text or "").lower().split())
+    return len(text.split()) < MIN_STATIC_WORDS and any(marker in text for marker in NOT_FOUND_MARKERS)
+
+
+def _gone_error(url, status_code, reason):
+    """HTTPError for a removed posting, shaped like the one raise_for_status gives"""
+    import requests
+
+    response = requests.Response()
+    response.status_code = status_code
+    response.url = url
+    return requests.HTTPError(f"{status_code} Client Error: {reason} for url: {url}", response=response)
+
+
+def _probe_status(url):
+    """Status of a known client-side page over plain HTTP, without reading the body; None if unreachable"""
+    import requests
+
+    try:
+        with requests.get(url, headers={"User-Agent": USER_AGENT}, timeout=REQUEST_TIMEOUT_SECONDS,
+                          stream=True) as response:
+            return response.status_code
+    except requests.RequestException:
+        return None
+
+
+def fetch_page(url):
+    """
+    Fetch a job page over plain HTTP and fall back to the headless browser pool
+    only when the page turns out to be rendered client-side.
+    Returns a dict with the raw html, visible text, HTTP status and render timing.
+    A removed posting raises requests.HTTPError with a 404 or 410 status, including
+    on client-side hosts that render a "not found" page instead of returning one.
+    """
+    import requests
+
+    page = {"url": url, "html": "", "text": "", "status": None, "rendered": False, "render_seconds": 0.0}
+
+    if is_js_rendered_host(url):
+        # Known client-side career sites go to the browser, after a cheap status probe.
+        # Other errors are left to the browser, since some hosts only block plain HTTP clients.
+        status = _probe_status(url)
+        if status in GONE_STATUS_CODES:
+            raise _gone_error(url, status, "Not Found" if status == 404 else "Gone")
+        page["status"] = status
+    else:
+        response = requests.get(url, headers={"User-Agent": USER_AGENT}, timeout=REQUEST_TIMEOUT_SECONDS)
+        response.raise_for_status()
+        page.update(html=response.text, text=html_to_text(response.text), status=response.status_code)
+        if not needs_js_rendering(url, page["html"], page["text"]):
+            return page
+
+    html, render_seconds = get_browser_pool().render(url)
+    text = html_to_text(html)
+    if is_not_found_page(text):
+        raise _gone_error(url, 404, "posting not found")
+    page.update(html=html, text=text, rendered=True, render_seconds=render_seconds)
+    return page
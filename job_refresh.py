@@ -0,0 +1,313 @@
+"""
+Re-checking saved jobs against their live postings.
+
+Run as a CLI (e.g. from cron) to refresh every saved job in batches:
+    python job_refresh.py --batch-size 500 --workers 8 --per-host 2 --host-delay 1.0 --stale-hours 24
+"""
+import argparse
+import json
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+
+import db_operations as db_ops
+from utils import split_chunks, chunk_hash, page_fingerprint, normalize_url
+
+# Re-extract the whole page when more than this share of its paragraphs is new
+FULL_REEXTRACT_RATIO = 0.5
+
+# Fields a partial extraction can't judge, since it only sees the changed paragraphs
+FULL_EXTRACTION_FIELDS = ("description", "skills")
+
+# Bulk refresh defaults
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_WORKERS = 8
+DEFAULT_PER_HOST = 2
+DEFAULT_HOST_DELAY_SECONDS = 1.0
+
+# HTTP statuses that mean the posting has been taken down
+DEAD_STATUS_CODES = {404, 410}
+
+
+def diff_chunks(old_hashes, chunks):
+    """Return (added chunks, number of removed chunks) between a stored fingerprint and fresh chunks"""
+    old = set(old_hashes)
+    added = [chunk for chunk in chunks if chunk_hash(chunk) not in old]
+    new = {chunk_hash(chunk) for chunk in chunks}
+    removed = sum(1 for old_hash in old_hashes if old_hash not in new)
+    return added, removed
+
+
+def _normalize(value):
+    if isinstance(value, list):
+        value = ", ".join(str(item) for item in value)
+    return ' '.join(str(value or "").split())
+
+
+def _role_key(role):
+    return _normalize(role).lower()
+
+
+def shares_posting(jobs):
+    """Whether saved jobs for one URL are different postings on the same page"""
+    return len({_role_key(job.role) for job in jobs}) > 1
+
+
+def _match_extracted(job, extracted, shared_url=False):
+    """Pick the extracted posting that corresponds to the saved job"""
+    role = _role_key(job.role)
+    for candidate in extracted:
+        if _role_key(candidate.get("role")) == role:
+            return candidate
+    # A changed paragraph often yields a partial object without the role. With
+    # several postings saved from the page there is no telling whose it is.
+    if len(extracted) == 1 and not shared_url:
+        return extracted[0]
+    return None
+
+
+def _changed_fields(job, extracted, full):
+    """Fields whose extracted value differs from the saved job"""
+    updates = {}
+    for field in db_ops.JOB_FIELDS:
+        if field in FULL_EXTRACTION_FIELDS and not full:
+            continue
+        new_value = _normalize(extracted.get(field))
+        if new_value and new_value != _normalize(getattr(job, field)):
+            updates[field] = new_value
+    return updates
+
+
+def _needs_full_extraction(job, extracted, match):
+    """
+    Whether a partial extraction left fields only the whole page can settle:
+    it changed the description or skills, or found postings it couldn't tie
+    to this job. Saving the new page hashes without them would leave the job
+    stale, since later checks would then match the hash and skip extraction.
+    """
+    if match is None:
+        return bool(extracted)
+    return any(field in FULL_EXTRACTION_FIELDS for field in _changed_fields(job, match, full=True))
+
+
+def diff_job(job, page_text, extract_jobs, shared_url=False):
+    """
+    Compare a fresh scrape of a saved job against its stored fingerprint.
+
+    An identical page skips extraction entirely. Otherwise only the new
+    paragraphs go through extract_jobs, unless most of the page changed or
+    the job was saved without a fingerprint, in which case the full page does.
+    A partial extraction that touches the description or skills is redone on
+    the full page, since those fields can't be judged from a few paragraphs.
+    Pass shared_url when other postings were saved from the same page, so an
+    extraction is only applied to the job whose role it names.
+    Returns (result describing what changed, column updates to write).
+    """
+    fingerprint = page_fingerprint(page_text)
+    now = datetime.utcnow()
+
+    if job.content_hash and job.content_hash == fingerprint["content_hash"]:
+        result = {"job_id": job.id, "status": "unchanged", "extraction": "skipped", "changed_fields": []}
+        return result, {"status": "active", "last_checked": now}
+
+    chunks = split_chunks(page_text)
+    old_hashes = json.loads(job.chunk_hashes) if job.chunk_hashes else []
+    added, removed = diff_chunks(old_hashes, chunks)
+
+    if not old_hashes or len(added) > FULL_REEXTRACT_RATIO * max(len(chunks), 1):
+        extraction, text = "full", ' '.join(chunks)
+    elif added:
+        extraction, text = "partial", ' '.join(added)
+    else:
+        # Paragraphs were only removed; nothing new to read
+        extraction, text = "skipped", ""
+
+    updates = {}
+    if text:
+        extracted = extract_jobs(text)
+        match = _match_extracted(job, extracted, shared_url)
+        if extraction == "partial" and _needs_full_extraction(job, extracted, match):
+            extraction = "full"
+            match = _match_extracted(job, extract_jobs(' '.join(chunks)), shared_url)
+        if match:
+            updates = _changed_fields(job, match, full=extraction == "full")
+
+    result = {
+        "job_id": job.id,
+        "status": "updated" if updates else "content_changed",
+        "extraction": extraction,
+        "changed_fields": sorted(updates),
+        "added_chunks": len(added),
+        "removed_chunks": removed,
+    }
+    return result, {**updates, **fingerprint, "status": "active", "last_checked": now}
+
+
+def recheck_job(db, job, page_text, extract_jobs):
+    """Re-check a single saved job and write the result back"""
+    shared_url = shares_posting(db_ops.get_jobs_by_url(db, job.user_id, job.url))
+    result, updates = diff_job(job, page_text, extract_jobs, shared_url)
+    saved = db_ops.update_job(db, job, updates)
+    if saved is not None and saved.id != result["job_id"]:
+        # The update made it a copy of another saved job, which it was merged into
+        result["merged_into"] = saved.id
+    return result
+
+
+class HostThrottle:
+    """Caps concurrent requests per host and spaces out consecutive requests to the same host"""
+
+    def __init__(self, per_host=DEFAULT_PER_HOST, delay=DEFAULT_HOST_DELAY_SECONDS):
+        self.per_host = per_host
+        self.delay = delay
+        self._semaphores = {}
+        self._next_allowed = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, url):
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            semaphore = self._semaphores.setdefault(host, threading.BoundedSemaphore(self.per_host))
+        with semaphore:
+            # Reserve the next start time for this host, then wait for it outside the lock
+            with self._lock:
+                now = time.monotonic()
+                start_at = max(now, self._next_allowed.get(host, now))
+                self._next_allowed[host] = start_at + self.delay
+            time.sleep(max(0.0, start_at - now))
+            yield
+
+
+def lazy_extractor():
+    """extract_jobs callable that only builds the LLM client if some page actually changed"""
+    chain = None
+    lock = threading.Lock()
+
+    def extract_jobs(text):
+        nonlocal chain
+        with lock:
+            if chain is None:
+                from chains import Chain
+                chain = Chain()
+        return chain.extract_jobs(text)
+
+    return extract_jobs
+
+
+def _check_url(url, jobs, throttle, extract_jobs):
+    """Fetch one posting URL and diff every saved job that points at it"""
+    import requests
+    from fetcher import fetch_page
+
+    now = datetime.utcnow()
+    try:
+        with throttle.slot(url):
+            page = fetch_page(url)
+    except requests.HTTPError as e:
+        status_code = e.response.status_code if e.response is not None else None
+        if status_code in DEAD_STATUS_CODES:
+            return [
+                (job, {"job_id": job.id, "status": "dead", "http_status": status_code},
+                 {"status": "dead", "last_checked": now})
+                for job in jobs
+            ]
+        # Leave last_checked alone so the next run retries
+        return [(job, {"job_id": job.id, "status": "error", "error": str(e)}, None) for job in jobs]
+    except Exception as e:
+        return [(job, {"job_id": job.id, "status": "error", "error": str(e)}, None) for job in jobs]
+
+    shared_url = shares_posting(jobs)
+    checked = []
+    for job in jobs:
+        try:
+            result, updates = diff_job(job, page["text"], extract_jobs, shared_url)
+        except Exception as e:
+            result, updates = {"job_id": job.id, "status": "error", "error": str(e)}, None
+        checked.append((job, result, updates))
+    return checked
+
+
+def refresh_saved_jobs(db, extract_jobs=None, batch_size=DEFAULT_BATCH_SIZE, workers=DEFAULT_WORKERS,
+                       per_host=DEFAULT_PER_HOST, host_delay=DEFAULT_HOST_DELAY_SECONDS,
+                       user_id=None, stale_hours=None, progress=print):
+    """
+    Walk saved jobs in keyset-paginated batches, re-check each posting and
+    write the results back with one bulk update per batch. Only one batch of
+    jobs is held in memory at a time. Returns a Counter of result statuses.
+    """
+    extract_jobs = extract_jobs or lazy_extractor()
+    throttle = HostThrottle(per_host, host_delay)
+    checked_before = datetime.utcnow() - timedelta(hours=stale_hours) if stale_hours else None
+    summary = Counter()
+    last_id = 0
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="refresh") as executor:
+        while True:
+            jobs = db_ops.get_jobs_after(db, last_id, batch_size, user_id=user_id, checked_before=checked_before)
+            if not jobs:
+                break
+            last_id = jobs[-1].id
+
+            # Fetch each posting once even when several saved jobs share it
+            by_url = defaultdict(list)
+            for job in jobs:
+                by_url[job.normalized_url or normalize_url(job.url)].append(job)
+
+            futures = [
+                executor.submit(_check_url, group[0].url, group, throttle, extract_jobs)
+                for group in by_url.values()
+            ]
+            job_updates = []
+            for future in as_completed(futures):
+                for job, result, updates in future.result():
+                    summary[result["status"]] += 1
+                    if updates:
+                        job_updates.append((job, updates))
+
+            db_ops.bulk_update_jobs(db, job_updates)
+            # Drop this batch from the session so memory stays flat across batches
+            db.expunge_all()
+            if progress:
+                progress(f"Checked jobs up to id {last_id}: {dict(summary)}")
+
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-check saved jobs against their live postings")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Concurrent fetches overall")
+    parser.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST, help="Concurrent fetches per host")
+    parser.add_argument("--host-delay", type=float, default=DEFAULT_HOST_DELAY_SECONDS,
+                        help="Minimum seconds between requests to the same host")
+    parser.add_argument("--user-id", type=int, help="Only refresh this user's jobs")
+    parser.add_argument("--stale-hours", type=float, help="Skip jobs checked within this many hours")
+    args = parser.parse_args(argv)
+
+    from database import SessionLocal, init_db
+
+    init_db()
+    db = SessionLocal()
+    try:
+        summary = refresh_saved_jobs(
+            db,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            per_host=args.per_host,
+            host_delay=args.host_delay,
+            user_id=args.user_id,
+            stale_hours=args.stale_hours,
+        )
+    finally:
+        db.close()
+    print(f"Done: {dict(summary)}")
+    return summary
+
+
+if __name__ == "__main__":
+    main()
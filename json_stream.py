@@ -0,0 +1,104 @@
+import json
+
+from langchain_core.utils.json import parse_partial_json
+
+
+class JsonObjectStream:
+    """
+    Incrementally splits streamed model output holding a JSON array of objects
+    (or a single object) into complete objects, as soon as each one closes.
+    Text before the first bracket, such as a preamble or code fence, is ignored.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.started = False
+        self.array = False
+        self.parsed = 0
+        self.malformed = 0
+        self.truncated = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._object_start = None
+
+    def feed(self, chunk):
+        """Add a chunk of output and return the objects it completed"""
+        self.text += chunk
+        completed = []
+        text = self.text
+        for index in range(self._pos, len(text)):
+            char = text[index]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if not self.started:
+                if char in "[{":
+                    self.started = True
+                    self.array = char == "["
+                else:
+                    continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "[{":
+                # Objects are top-level values: directly inside the array, or the whole response
+                if char == "{" and self._depth == (1 if self.array else 0):
+                    self._object_start = index
+                self._depth += 1
+            elif char in "]}":
+                self._depth -= 1
+                if char == "}" and self._object_start is not None and self._depth == (1 if self.array else 0):
+                    obj = self._load(text[self._object_start:index + 1])
+                    if obj is not None:
+                        completed.append(obj)
+                    self._object_start = None
+        self._pos = len(text)
+        return completed
+
+    def close(self):
+        """
+        Finish the stream. An object cut off by truncated output is repaired by
+        closing its open strings and brackets, so the jobs before the cut are kept.
+        """
+        if self._object_start is None:
+            return []
+        fragment = self.text[self._object_start:]
+        self._object_start = None
+        self.truncated = True
+        try:
+            obj = parse_partial_json(fragment)
+        except json.JSONDecodeError:
+            obj = None
+        if not isinstance(obj, dict) or not obj:
+            self.malformed += 1
+            return []
+        self.parsed += 1
+        return [obj]
+
+    @property
+    def failed(self):
+        """True when the output held no usable JSON at all"""
+        return not self.started or (self.parsed == 0 and self.malformed > 0)
+
+    def _load(self, fragment):
+        try:
+            obj = json.loads(fragment)
+        except json.JSONDecodeError:
+            # Models sometimes emit trailing commas or unescaped newlines inside an object
+            try:
+                obj = parse_partial_json(fragment)
+            except json.JSONDecodeError:
+                obj = None
+        if not isinstance(obj, dict):
+            self.malformed += 1
+            return None
+        self.parsed += 1
+        return obj
@@ -10,44 +10,90 @@ if not os.getenv("GROQ_API_KEY"):
     st.error("GROQ_API_KEY not found in environment variables!")
     st.info("Please make sure your .env file exists and contains the GROQ_API_KEY.")
 
-from langchain_community.document_loaders import WebBaseLoader
-import pandas as pd
-import requests
 import json
-from datetime import datetime
-import uuid
+import time
 from sqlalchemy.orm import Session
 
-from chains import Chain
-from utils import clean_text, find_recruiter_email
-from database import get_db, init_db
+# Heavy dependencies (pandas, langchain, the LLM client) are imported on the code paths that use them
+from database import SessionLocal, get_db, init_db
 import db_operations as db_ops
-from auth import verify_password, get_password_hash, create_access_token
+from auth import (
+    verify_password, get_password_hash, create_session_token, user_id_from_token, revoke_session_token, login_limiter,
+    HashingBusyError
+)
+from portfolio_import import import_portfolio_csv, PortfolioImportError
+
+
+@st.cache_resource(show_spinner=False)
+def init_database():
+    """Create the schema once per process instead of on every rerun"""
+    init_db()
+
 
 # Initialize the database
-init_db()
+init_database()
+
+# Seconds between status checks while generation tasks are running
+TASK_POLL_SECONDS = 1.5
+
+# Query parameter holding the signed session token
+SESSION_PARAM = "session"
+
+# Shown when password hashing is too busy to answer in time
+BUSY_MESSAGE = "The server is busy right now. Please try again in a moment."
+
+# Rows per page of the uploaded portfolio preview
+PREVIEW_PAGE_SIZE = 50
 
 # Initialize session states
 if 'user_id' not in st.session_state:
-    st.session_state.user_id = None
+    # Restore the login from the signed token after a reload or reconnect, without a DB lookup
+    st.session_state.user_id = user_id_from_token(st.query_params.get(SESSION_PARAM))
 
 if 'current_job_id' not in st.session_state:
     st.session_state.current_job_id = None
 
+if 'active_task_id' not in st.session_state:
+    st.session_state.active_task_id = None
+
+if 'refresh_task_id' not in st.session_state:
+    st.session_state.refresh_task_id = None
+
+if 'export_task_id' not in st.session_state:
+    st.session_state.export_task_id = None
+
+
+@st.cache_resource(show_spinner=False)
+def get_task_queue():
+    """Worker pool shared by every session in this process"""
+    from task_queue import TaskQueue
+    return TaskQueue()
+
 
 def login_user(db: Session, email: str, password: str):
     """Log in a user and return user ID if successful"""
+    # Reject rate-limited emails before paying for a bcrypt check
+    if login_limiter.retry_after(email):
+        return None
+    
     user = db_ops.get_user_by_email(db, email)
     
-    if not user:
+    if not user or not verify_password(password, user.hashed_password):
+        login_limiter.record_failure(email)
         return None
     
-    if not verify_password(password, user.hashed_password):
-        return None
-        
+    login_limiter.reset(email)
     return user.id
 
 
+def start_session(user_id: int):
+    """Mark the user as logged in and keep a revocable session token in the URL to restore it"""
+    st.session_state.user_id = user_id
+    token = create_session_token(user_id)
+    if token:
+        st.query_params[SESSION_PARAM] = token
+
+
 def register_user(db: Session, email: str, password: str):
     """Register a new user and return user ID if successful"""
     existing_user = db_ops.get_user_by_email(db, email)
@@ -77,12 +123,19 @@ def login_page():
                 st.error("Please fill in all fields")
                 return
             
-            # Get database session
-            session = next(get_db())
+            retry_after = login_limiter.retry_after(email)
+            if retry_after:
+                st.error(f"Too many failed login attempts. Please try again in {retry_after} seconds.")
+                return
             
-            user_id = login_user(session, email, password)
+            try:
+                with SessionLocal() as session:
+                    user_id = login_user(session, email, password)
+            except HashingBusyError:
+                st.error(BUSY_MESSAGE)
+                return
             if user_id:
-                st.session_state.user_id = user_id
+                start_session(user_id)
                 st.success("Login successful!")
                 st.rerun()
             else:
@@ -103,18 +156,155 @@ def login_page():
                 st.error("Passwords do not match")
                 return
                 
-            # Get database session
-            session = next(get_db())
-            
-            user_id = register_user(session, email, password)
+            try:
+                with SessionLocal() as session:
+                    user_id = register_user(session, email, password)
+            except HashingBusyError:
+                st.error(BUSY_MESSAGE)
+                return
             if user_id:
-                st.session_state.user_id = user_id
+                start_session(user_id)
                 st.success("Registration successful! You are now logged in.")
                 st.rerun()
             else:
                 st.error("Email already registered")
 
 
+def render_task_results(db: Session, root_id: int):
+    """Show the progress and results of a submission. Returns True while tasks are still running."""
+    tasks = db_ops.get_tasks_by_root(db, root_id)
+    unfinished = [task for task in tasks if task.status in ("pending", "running")]
+    
+    for task in tasks:
+        if task.status == "failed":
+            st.error(f"An Error Occurred: {task.error}")
+        elif task.kind == "fetch" and task.status == "done":
+            fetch_result = json.loads(task.result)
+            if fetch_result.get("rendered"):
+                st.caption(f"Page rendered in a headless browser in {fetch_result['render_seconds']}s")
+            if fetch_result.get("structured_source"):
+                st.caption(f"Job details read from the page's {fetch_result['structured_source']} data, no LLM extraction needed")
+    
+    generate_tasks = [task for task in tasks if task.kind == "generate" and task.status == "done"]
+    documents = {doc.task_id: doc for doc in db_ops.get_documents_by_task_ids(db, [task.id for task in generate_tasks])}
+    
+    for task in generate_tasks:
+        result = json.loads(task.result)
+        doc = documents.get(task.id)
+        if doc is None:
+            continue
+        
+        if result.get("job_id"):
+            st.session_state.current_job_id = result["job_id"]
+            st.success(f"Job saved: {result.get('role', 'Unknown Role')}")
+        
+        if result.get("searched_email"):
+            if result.get("recruiter_email"):
+                st.info(f"Found potential recruiter email: {result['recruiter_email']}")
+            else:
+                st.warning("Could not find recruiter email automatically.")
+        
+        # Generate document headers based on the stored document type
+        if doc.document_type == "cover_letter":
+            st.subheader("📜 Generated Cover Letter")
+        elif doc.document_type == "resume":
+            st.subheader("📄 Generated Resume")
+        else:
+            st.subheader("📨 Generated Cold Email")
+        
+        if result.get("reused_document_id"):
+            st.caption("Adapted from one of your earlier documents for a similar job")
+        
+        # Display the generated content
+        st.code(doc.content, language='markdown')
+        
+        # Add download button for the generated content
+        option = doc.document_type.replace("_", " ").title()
+        st.download_button(
+            label=f"Download {option}",
+            data=doc.content,
+            file_name=f"{doc.document_type}_{doc.created_at.strftime('%Y%m%d')}.md",
+            mime="text/markdown",
+            key=f"download_task_{task.id}"
+        )
+    
+    if unfinished:
+        # Make sure the worker pool is running, e.g. to resume tasks after a restart
+        get_task_queue()
+        stages = ", ".join(sorted({task.kind for task in unfinished}))
+        st.info(f"Processing job data... ({len(tasks) - len(unfinished)}/{len(tasks)} tasks done, waiting on: {stages})")
+    
+    return bool(unfinished)
+
+
+def render_refresh_result(db: Session, task_id: int):
+    """Show the outcome of a saved job re-check. Returns True while it is still running."""
+    task = db_ops.get_task_by_id(db, task_id)
+    if task is None:
+        return False
+    
+    if task.status in ("pending", "running"):
+        get_task_queue()
+        st.info("Checking the job posting for updates...")
+        return True
+    
+    if task.status == "failed":
+        st.error(f"An Error Occurred: {task.error}")
+        return False
+    
+    result = json.loads(task.result)
+    if result["status"] == "updated":
+        st.success(f"{result['role']}: posting changed, updated {', '.join(result['changed_fields'])}.")
+    elif result["status"] == "content_changed":
+        st.info(f"{result['role']}: page changed but the job details are the same.")
+    else:
+        st.info(f"{result['role']}: posting unchanged.")
+    return False
+
+
+def render_export_status(db: Session, task_id: int):
+    """Show export progress and a download button when done. Returns True while running."""
+    task = db_ops.get_task_by_id(db, task_id)
+    if task is None:
+        return False
+    
+    if task.status in ("pending", "running"):
+        get_task_queue()
+        progress = json.loads(task.result) if task.result else {}
+        total = progress.get("total") or 0
+        written = progress.get("written", 0)
+        st.progress(min(written / total, 1.0) if total else 0.0, text=f"Exporting... {written}/{total or '?'} records")
+        return True
+    
+    if task.status == "failed":
+        st.error(f"An Error Occurred: {task.error}")
+        return False
+    
+    result = json.loads(task.result)
+    if not os.path.exists(result["path"]):
+        st.warning("The export file is no longer available. Please start a new export.")
+        return False
+    
+    # download_button reads the whole file into memory, so only build it on request
+    if st.session_state.get("export_download_id") != task.id:
+        if not st.button(f"Prepare download ({result['written']} records)", key=f"prepare_export_{task.id}"):
+            return False
+        st.session_state.export_download_id = task.id
+    
+    with open(result["path"], "rb") as export_file:
+        downloaded = st.download_button(
+            label=f"Download export ({result['written']} records)",
+            data=export_file,
+            file_name=os.path.basename(result["path"]),
+            mime="application/octet-stream",
+            key=f"download_export_{task.id}"
+        )
+    if downloaded:
+        # Drop the button so later reruns don't load the file again
+        st.session_state.export_download_id = None
+    return False
+
+
 def main_app():
     """Main application interface after login"""
     st.title("📧 Cover Letter, Resume & Cold Email Generator")
@@ -124,6 +314,7 @@ def main_app():
     
     # Get database session
     db = next(get_db())
+    poll_tasks = False
     
     with tab1:
         st.header("Generate Application Materials")
@@ -136,86 +327,27 @@ def main_app():
         # Add option to save job
         save_job = st.checkbox("Save this job to your list")
         
+        reuse_documents = st.checkbox(
+            "Adapt my most similar earlier letter or email instead of writing from scratch (faster)"
+        )
+        
+        refetch = st.checkbox("Fetch the page again even if I saved jobs from it recently")
+        
         submit_button = st.button("Generate")
 
         if submit_button:
             try:
-                # Show a spinner while processing
-                with st.spinner("Processing job data..."):
-                    # Initialize the LLM chain
-                    chain = Chain()
-                    
-                    loader = WebBaseLoader([url_input])
-                    data = clean_text(loader.load().pop().page_content)
-                    jobs = chain.extract_jobs(data)
-                    
-                    for job in jobs:
-                        # Save job to database if option is selected
-                        job_id = None
-                        if save_job:
-                            job_data = {
-                                "url": url_input,
-                                "company": job.get('company', 'Unknown Company'),
-                                "role": job.get('role', 'Unknown Role'),
-                                "description": job.get('description', ''),
-                                "experience": job.get('experience', ''),
-                                "skills": job.get('skills', [])
-                            }
-                            
-                            db_job = db_ops.create_job(db, st.session_state.user_id, job_data)
-                            job_id = db_job.id
-                            st.session_state.current_job_id = job_id
-                            st.success(f"Job saved: {job.get('role', 'Unknown Role')}")
-                        
-                        # Get user's portfolio items that match the job skills
-                        skills = job.get('skills', [])
-                        portfolio_items = db_ops.query_portfolio_by_skills(db, st.session_state.user_id, skills)
-                        
-                        # Format portfolio items for the LLM
-                        portfolio_data = []
-                        for item in portfolio_items:
-                            portfolio_data.append({
-                                "techstack": item.tech_stack,
-                                "links": item.link
-                            })
-                        
-                        # Get recruiter email if option is selected and it's a cold email
-                        recruiter_email = None
-                        if find_email and option == "Cold Email":
-                            recruiter_email = find_recruiter_email(job.get('company', ''))
-                            if recruiter_email:
-                                st.info(f"Found potential recruiter email: {recruiter_email}")
-                            else:
-                                st.warning("Could not find recruiter email automatically.")
-
-                        # Generate document based on selected option
-                        if option == "Cover Letter":
-                            output = chain.write_letter(job, portfolio_data)
-                            st.subheader("📜 Generated Cover Letter")
-                        elif option == "Resume":
-                            output = chain.write_resume(job)
-                            st.subheader("📄 Generated Resume")
-                        else:  # Cold Email
-                            output = chain.write_cold_email(job, portfolio_data, recruiter_email)
-                            st.subheader("📨 Generated Cold Email")
-
-                        # Display the generated content
-                        st.code(output, language='markdown')
-                        
-                        # Save the generated document to the database if job was saved
-                        if job_id:
-                            db_ops.create_generated_document(db, job_id, option.lower().replace(" ", "_"), output)
-                        
-                        # Add download button for the generated content
-                        st.download_button(
-                            label=f"Download {option}",
-                            data=output,
-                            file_name=f"{option.lower().replace(' ', '_')}_{datetime.now().strftime('%Y%m%d')}.md",
-                            mime="text/markdown"
-                        )
-
+                # Hand the work to the shared worker pool so a rerun doesn't kill the LLM calls
+                task_queue = get_task_queue()
+                st.session_state.active_task_id = task_queue.submit_generation(
+                    st.session_state.user_id, url_input, option, save_job=save_job, find_email=find_email,
+                    reuse_documents=reuse_documents, refetch=refetch
+                )
             except Exception as e:
                 st.error(f"An Error Occurred: {e}")
+
+        if st.session_state.active_task_id:
+            poll_tasks = render_task_results(db, st.session_state.active_task_id)
     
     with tab2:
         st.header("Saved Jobs")
@@ -224,21 +356,15 @@ def main_app():
         jobs = db_ops.get_user_jobs(db, st.session_state.user_id)
         
         if jobs:
-            # Create a list of job entries for display
-            job_data = []
-            for job in jobs:
-                job_data.append({
-                    "id": job.id,
-                    "company": job.company,
-                    "role": job.role,
-                    "date_saved": job.date_saved.strftime("%Y-%m-%d %H:%M:%S") if job.date_saved else "Unknown"
-                })
-            
-            # Create a dataframe for display
-            jobs_df = pd.DataFrame(job_data)
+            # JobSummary records are named tuples, so they load straight into a dataframe
+            import pandas as pd
+            jobs_df = pd.DataFrame(jobs, columns=db_ops.JobSummary._fields)
+            jobs_df["status"] = jobs_df["status"].fillna("active")
+            jobs_df["date_saved"] = pd.to_datetime(jobs_df["date_saved"]).dt.strftime("%Y-%m-%d %H:%M:%S").fillna("Unknown")
             
             # Display the jobs table
-            st.dataframe(jobs_df)
+            st.dataframe(jobs_df[["id", "company", "role", "status", "date_saved"]])
+            job_labels = {job.id: f"{job.company} - {job.role}" for job in jobs}
             
             # Create columns for job selection and action buttons
             col1, col2 = st.columns(2)
@@ -247,8 +373,8 @@ def main_app():
                 # Create a selectbox with job titles
                 selected_job_id = st.selectbox(
                     "Select a job to view or delete",
-                    options=[job["id"] for job in job_data],
-                    format_func=lambda x: next((f"{job['company']} - {job['role']}" for job in job_data if job["id"] == x), "")
+                    options=list(job_labels),
+                    format_func=lambda x: job_labels.get(x, "")
                 )
             
             with col2:
@@ -281,6 +407,15 @@ def main_app():
 
                         else:
                             st.error("Failed to delete job.")
+                
+                if st.button("Check for Updates"):
+                    if selected_job_id:
+                        st.session_state.refresh_task_id = get_task_queue().submit_refresh(
+                            st.session_state.user_id, selected_job_id
+                        )
+            
+            if st.session_state.refresh_task_id:
+                poll_tasks = render_refresh_result(db, st.session_state.refresh_task_id) or poll_tasks
             
             # Option to clear all saved jobs
             if st.button("Clear All Saved Jobs"):
@@ -290,6 +425,16 @@ def main_app():
                 st.rerun()
         else:
             st.info("No saved jobs yet. Generate a document and check 'Save this job' to add jobs here.")
+        
+        # Bulk export of every saved job and generated document
+        st.subheader("Export Everything")
+        import exporter
+        export_format = st.selectbox("Export format", exporter.available_formats())
+        if st.button("Start Export"):
+            st.session_state.export_task_id = get_task_queue().submit_export(st.session_state.user_id, export_format)
+        
+        if st.session_state.export_task_id:
+            poll_tasks = render_export_status(db, st.session_state.export_task_id) or poll_tasks
     
     with tab3:
         st.header("Portfolio Management")
@@ -301,33 +446,33 @@ def main_app():
             st.markdown("Upload a CSV file with your portfolio details. The file should have 'Techstack' and 'Links' columns.")
             
             uploaded_file = st.file_uploader("Choose a CSV file", type="csv")
-            if uploaded_file is not None:
+            # The uploader keeps its file across reruns, so import each upload only once
+            if uploaded_file is not None and st.session_state.get("portfolio_upload_id") != uploaded_file.file_id:
                 try:
-                    portfolio_df = pd.read_csv(uploaded_file)
-                    if 'Techstack' in portfolio_df.columns and 'Links' in portfolio_df.columns:
-                        # Clear existing portfolio items
-                        existing_items = db_ops.get_user_portfolio(db, st.session_state.user_id)
-                        for item in existing_items:
-                            db_ops.delete_portfolio_item(db, item.id)
-                        
-                        # Add new portfolio items from CSV
-                        for _, row in portfolio_df.iterrows():
-                            db_ops.create_portfolio_item(
-                                db, 
-                                st.session_state.user_id,
-                                row['Techstack'],
-                                row['Links']
-                            )
-                        
-                        st.success("Portfolio uploaded successfully!")
-                        
-                        # Preview the data
-                        st.subheader("Portfolio Preview")
-                        st.dataframe(portfolio_df)
-                    else:
-                        st.error("CSV must contain 'Techstack' and 'Links' columns")
+                    st.session_state.portfolio_upload = import_portfolio_csv(db, st.session_state.user_id, uploaded_file)
+                    st.session_state.portfolio_upload_id = uploaded_file.file_id
+                except PortfolioImportError as e:
+                    st.error(str(e))
                 except Exception as e:
                     st.error(f"Error processing CSV: {e}")
+            
+            upload = st.session_state.get("portfolio_upload")
+            if uploaded_file is not None and upload and st.session_state.get("portfolio_upload_id") == uploaded_file.file_id:
+                st.success(f"Portfolio uploaded successfully! {upload['rows']} entries imported.")
+                if upload["skipped"]:
+                    st.warning(f"Skipped {upload['skipped']} rows without a tech stack or link.")
+                
+                # Preview the data a page at a time
+                st.subheader("Portfolio Preview")
+                preview = upload["preview"]
+                pages = max(1, -(-len(preview) // PREVIEW_PAGE_SIZE))
+                page = st.number_input("Preview page", min_value=1, max_value=pages, value=1, step=1)
+                start = (page - 1) * PREVIEW_PAGE_SIZE
+                st.dataframe(
+                    [{"Techstack": tech_stack, "Links": link} for tech_stack, link in preview[start:start + PREVIEW_PAGE_SIZE]]
+                )
+                if upload["rows"] > len(preview):
+                    st.caption(f"Showing the first {len(preview)} of {upload['rows']} entries.")
         
         with portfolio_tab2:
             st.subheader("Manual Portfolio Entry")
@@ -337,18 +482,15 @@ def main_app():
             
             # Show existing entries
             if portfolio_items:
-                portfolio_data = []
-                for item in portfolio_items:
-                    portfolio_data.append({
-                        "id": item.id,
-                        "Tech Stack": item.tech_stack,
-                        "Link": item.link,
-                        "Created": item.created_at.strftime("%Y-%m-%d")
-                    })
-                
                 st.subheader("Current Portfolio Entries")
-                portfolio_df = pd.DataFrame(portfolio_data)
+                import pandas as pd
+                portfolio_df = pd.DataFrame(
+                    [(item.id, item.tech_stack, item.link, item.created_at) for item in portfolio_items],
+                    columns=["id", "Tech Stack", "Link", "Created"]
+                )
+                portfolio_df["Created"] = pd.to_datetime(portfolio_df["Created"]).dt.strftime("%Y-%m-%d")
                 st.dataframe(portfolio_df)
+                item_labels = {item.id: f"{item.tech_stack} - {item.link}" for item in portfolio_items}
                 
                 # Option to delete an item
                 col1, col2 = st.columns(2)
@@ -356,8 +498,8 @@ def main_app():
                 with col1:
                     selected_item_id = st.selectbox(
                         "Select an item to delete",
-                        options=[item["id"] for item in portfolio_data],
-                        format_func=lambda x: next((f"{item['Tech Stack']} - {item['Link']}" for item in portfolio_data if item["id"] == x), "")
+                        options=list(item_labels),
+                        format_func=lambda x: item_labels.get(x, "")
                     )
                 
                 with col2:
@@ -392,11 +534,18 @@ def main_app():
             if linkedin_import_btn:
                 st.warning("LinkedIn import functionality is currently in development. Please use CSV upload or manual entry for now.")
 
+    # Poll after every tab has rendered so waiting on tasks doesn't block the other tabs
+    if poll_tasks:
+        time.sleep(TASK_POLL_SECONDS)
+        st.rerun()
+
 
 def logout():
     """Log out the current user"""
     for key in list(st.session_state.keys()):
         del st.session_state[key]
+    revoke_session_token(st.query_params.get(SESSION_PARAM))
+    st.query_params.clear()
     st.rerun()
 
 
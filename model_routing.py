@@ -0,0 +1,117 @@
+import os
+import re
+import threading
+
+# Groq models per task. Extraction drafts on the small model and escalates to the large one.
+DEFAULT_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+EXTRACT_DRAFT_MODEL = os.getenv("GROQ_EXTRACT_DRAFT_MODEL", "llama-3.1-8b-instant")
+
+# USD per million (input, output) tokens, from Groq's price list
+MODEL_PRICES = {
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+    "llama-3.1-8b-instant": (0.05, 0.08),
+}
+
+# Keys every extracted job must carry
+JOB_KEYS = ("role", "company", "experience", "skills", "description")
+
+# Descriptions shorter than this are treated as a draft that missed the posting body
+MIN_DESCRIPTION_WORDS = 5
+
+
+def model_name(llm):
+    return getattr(llm, "model_name", None) or getattr(llm, "model", None) or type(llm).__name__
+
+
+def token_usage(message, prompt_text):
+    """(input, output) tokens of a response, estimated at ~4 characters per token when not reported"""
+    usage = getattr(message, "usage_metadata", None) or {}
+    if usage.get("input_tokens") is not None and usage.get("output_tokens") is not None:
+        return usage["input_tokens"], usage["output_tokens"]
+    return len(prompt_text) // 4, len(str(message.content)) // 4
+
+
+def cost(model, input_tokens, output_tokens):
+    input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+def _alnum(text):
+    return re.sub(r'[^a-z0-9]', '', text.lower())
+
+
+def validate_jobs(jobs, page_text):
+    """
+    Check draft extraction output against the job schema. Returns the reason
+    it should be escalated, or None when the draft can be used as is.
+    """
+    if not jobs:
+        return "no jobs"
+    # Pages arrive through clean_text, which strips punctuation, so compare letters and digits only
+    page_key = _alnum(page_text)
+    for job in jobs:
+        if not isinstance(job, dict):
+            return "not an object"
+        missing = [key for key in JOB_KEYS if key not in job]
+        if missing:
+            return f"missing {', '.join(missing)}"
+        if not isinstance(job["role"], str) or not job["role"].strip():
+            return "empty role"
+        if not isinstance(job["skills"], (list, str)):
+            return "invalid skills"
+        if len(str(job["description"] or "").split()) < MIN_DESCRIPTION_WORDS:
+            return "short description"
+        # Low confidence: a role that doesn't appear on the page was probably made up
+        if _alnum(job["role"]) not in page_key:
+            return "role not on page"
+    return None
+
+
+class RoutingStats:
+    """Counts extraction escalations and the latency and cost saved by the draft model"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.drafts = 0
+        self.escalations = {}
+        self.draft_seconds = 0.0
+        self.draft_cost = 0.0
+        self.large_calls = 0
+        self.large_seconds = 0.0
+        self.large_cost = 0.0
+        # What the large model would have charged for the tokens of accepted drafts
+        self.avoided_cost = 0.0
+
+    def record_draft(self, seconds, draft_cost, large_equivalent_cost, escalation_reason=None):
+        with self._lock:
+            self.drafts += 1
+            self.draft_seconds += seconds
+            self.draft_cost += draft_cost
+            if escalation_reason:
+                self.escalations[escalation_reason] = self.escalations.get(escalation_reason, 0) + 1
+            else:
+                self.avoided_cost += large_equivalent_cost
+
+    def record_large(self, seconds, call_cost):
+        with self._lock:
+            self.large_calls += 1
+            self.large_seconds += seconds
+            self.large_cost += call_cost
+
+    def summary(self):
+        with self._lock:
+            escalated = sum(self.escalations.values())
+            accepted = self.drafts - escalated
+            avg_large = self.large_seconds / self.large_calls if self.large_calls else 0.0
+            return {
+                "drafts": self.drafts,
+                "escalations": dict(self.escalations),
+                "escalation_rate": round(escalated / self.drafts, 3) if self.drafts else 0.0,
+                "avg_draft_ms": round(self.draft_seconds / self.drafts * 1000, 3) if self.drafts else 0.0,
+                "avg_large_ms": round(avg_large * 1000, 3),
+                "estimated_seconds_saved": round(accepted * avg_large - self.draft_seconds, 3),
+                "estimated_cost_saved_usd": round(self.avoided_cost - self.draft_cost, 6),
+            }
+
+
+stats = RoutingStats()
@@ -2,27 +2,48 @@ import pandas as pd
 import os
 import re
 
+# Only the columns the portfolio uses, read as strings
+CSV_COLUMNS = ["Techstack", "Links"]
+CSV_DTYPES = {"Techstack": str, "Links": str}
+
+
 class Portfolio:
     def __init__(self, file_path="resource/my_portfolio.csv"):
         self.file_path = file_path
-        
+        # The CSV is read on first use rather than on construction
+        self._data = None
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._ensure_file()
+            self._data = self._read()
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+
+    def _ensure_file(self):
         # Create resource directory if it doesn't exist
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
         
         # Check if portfolio file exists, create a default one if not
-        if not os.path.exists(file_path):
+        if not os.path.exists(self.file_path):
             default_data = {
                 "Techstack": ["React, Node.js, MongoDB", "Python, Django, MySQL"],
                 "Links": ["https://example.com/react-portfolio", "https://example.com/python-portfolio"]
             }
-            pd.DataFrame(default_data).to_csv(file_path, index=False)
-        
-        self.data = pd.read_csv(file_path)
+            pd.DataFrame(default_data).to_csv(self.file_path, index=False)
+
+    def _read(self):
+        return pd.read_csv(self.file_path, usecols=CSV_COLUMNS, dtype=CSV_DTYPES)
 
     def load_portfolio(self):
         # Read the latest data in case it was updated
         try:
-            self.data = pd.read_csv(self.file_path)
+            self._ensure_file()
+            self.data = self._read()
         except Exception as e:
             print(f"Error loading portfolio: {e}")
             # Create a default portfolio if there's an issue
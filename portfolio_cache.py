@@ -0,0 +1,86 @@
+import os
+import threading
+from collections import OrderedDict
+
+# Users whose portfolio snapshot is kept in memory, least recently used evicted first
+PORTFOLIO_CACHE_USERS = int(os.getenv("PORTFOLIO_CACHE_USERS", "256"))
+
+
+class PortfolioEntry:
+    """Read-only copy of a portfolio item with its matching keys precomputed"""
+
+    __slots__ = ("id", "user_id", "tech_stack", "link", "created_at", "tech_stack_lower", "skills")
+
+    def __init__(self, id, user_id, tech_stack, link, created_at):
+        self.id = id
+        self.user_id = user_id
+        self.tech_stack = tech_stack
+        self.link = link
+        self.created_at = created_at
+        self.tech_stack_lower = (tech_stack or "").lower()
+        self.skills = frozenset(
+            ' '.join(skill.split()) for skill in self.tech_stack_lower.split(",") if skill.strip()
+        )
+
+    def matches(self, skill):
+        """skill is lowercase; exact tech stack entries are checked before the substring scan"""
+        return skill in self.skills or skill in self.tech_stack_lower
+
+
+class PortfolioCache:
+    """
+    Per-user, versioned snapshots of portfolio items shared by every session
+    in the process. Each user has one LRU entry holding (version, snapshot),
+    so version tracking is bounded along with the snapshots. A write replaces
+    the entry with a new version and no snapshot, and a snapshot loaded under
+    an older version is never served.
+    """
+
+    def __init__(self, max_users=PORTFOLIO_CACHE_USERS):
+        self.max_users = max_users
+        self._entries = OrderedDict()
+        # Bumped by every write; versions come from it so they never repeat after an eviction
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _put(self, user_id, entry):
+        self._entries[user_id] = entry
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_users:
+            self._entries.popitem(last=False)
+
+    def get(self, user_id, load):
+        """Return the user's snapshot, calling load() for the rows when it is missing or stale"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] is not None:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            version = entry[0] if entry is not None else None
+            generation = self._generation
+
+        snapshot = tuple(load())
+
+        with self._lock:
+            # Only keep it if no write happened while it was loading. Once the
+            # entry is evicted its version is gone, so any write at all counts.
+            current = self._entries.get(user_id)
+            if current is None:
+                fresh = version is None and self._generation == generation
+            else:
+                fresh = current[0] == version
+            if fresh:
+                self._put(user_id, (generation if version is None else version, snapshot))
+        return snapshot
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._generation += 1
+            self._put(user_id, (self._generation, None))
+
+
+cache = PortfolioCache()
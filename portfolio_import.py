@@ -0,0 +1,89 @@
+import os
+
+import db_operations as db_ops
+
+# Columns a portfolio CSV must have, read as plain strings
+PORTFOLIO_CSV_COLUMNS = ("Techstack", "Links")
+
+# Rows parsed and inserted at a time
+CSV_CHUNK_ROWS = 5000
+
+# Upload limits; an upload over either is rejected and the existing portfolio kept
+MAX_PORTFOLIO_ROWS = int(os.getenv("MAX_PORTFOLIO_ROWS", "10000"))
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(5 * 1024 * 1024)))
+
+# Longer values are cut to this many characters
+MAX_FIELD_LENGTH = 1000
+
+# Valid rows kept for the preview shown after an upload
+PREVIEW_ROWS = 500
+
+
+class PortfolioImportError(ValueError):
+    """The uploaded CSV can't be imported; the message is shown to the user"""
+
+
+def _file_size(file):
+    size = getattr(file, "size", None)
+    if size is None:
+        position = file.tell()
+        size = file.seek(0, os.SEEK_END)
+        file.seek(position)
+    return size
+
+
+def iter_csv_rows(file, chunk_rows=CSV_CHUNK_ROWS):
+    """Yield DataFrame chunks of the portfolio columns, parsed as strings"""
+    import pandas as pd
+
+    try:
+        reader = pd.read_csv(
+            file,
+            usecols=list(PORTFOLIO_CSV_COLUMNS),
+            dtype={column: str for column in PORTFOLIO_CSV_COLUMNS},
+            keep_default_na=False,
+            chunksize=chunk_rows,
+        )
+        for chunk in reader:
+            yield chunk
+    except ValueError as e:
+        # pandas reports missing usecols columns as a ValueError
+        if "Usecols" in str(e) or "columns expected" in str(e):
+            raise PortfolioImportError("CSV must contain 'Techstack' and 'Links' columns") from e
+        raise PortfolioImportError(f"Could not read CSV: {e}") from e
+    except pd.errors.ParserError as e:
+        raise PortfolioImportError(f"Could not read CSV: {e}") from e
+
+
+def import_portfolio_csv(db, user_id, file, max_rows=MAX_PORTFOLIO_ROWS, max_bytes=MAX_UPLOAD_BYTES):
+    """
+    Replace a user's portfolio with the rows of an uploaded CSV. The file is
+    parsed in chunks that are validated and inserted as they are read, so
+    memory stays flat however large the file is. Rows without a tech stack or
+    link are skipped. Pass None to lift either limit.
+    Returns a summary with the inserted and skipped counts and a preview sample.
+    """
+    if max_bytes is not None and _file_size(file) > max_bytes:
+        raise PortfolioImportError(f"CSV is larger than the {max_bytes // (1024 * 1024)} MB upload limit")
+
+    summary = {"rows": 0, "skipped": 0, "preview": []}
+
+    def valid_rows():
+        for chunk in iter_csv_rows(file):
+            tech_stacks = chunk["Techstack"].str.strip().str.slice(0, MAX_FIELD_LENGTH)
+            links = chunk["Links"].str.strip().str.slice(0, MAX_FIELD_LENGTH)
+            valid = (tech_stacks != "") & (links != "")
+            summary["skipped"] += int((~valid).sum())
+            summary["rows"] += int(valid.sum())
+            if max_rows is not None and summary["rows"] > max_rows:
+                raise PortfolioImportError(f"CSV has more than {max_rows} portfolio rows")
+            
+            rows = zip(tech_stacks[valid], links[valid])
+            missing = PREVIEW_ROWS - len(summary["preview"])
+            if missing > 0:
+                rows = list(rows)
+                summary["preview"].extend(rows[:missing])
+            yield from rows
+
+    db_ops.replace_user_portfolio(db, user_id, valid_rows(), batch_size=CSV_CHUNK_ROWS)
+    return summary
@@ -0,0 +1,266 @@
+import json
+import re
+import threading
+import time
+from urllib.parse import urlparse
+
+from utils import WORKDAY_HOSTS, extract_company_from_workday
+
+# Technologies looked for in the description when a posting doesn't list skills
+KNOWN_SKILLS = [
+    "Python", "Java", "JavaScript", "TypeScript", "Go", "Rust", "C++", "C#", "Ruby", "PHP", "Kotlin", "Swift", "Scala",
+    "React", "Angular", "Vue", "Node.js", "Django", "Flask", "FastAPI", "Spring", ".NET", "Rails",
+    "SQL", "PostgreSQL", "MySQL", "MongoDB", "Redis", "Kafka", "Elasticsearch", "Snowflake", "Spark", "Airflow",
+    "AWS", "Azure", "GCP", "Docker", "Kubernetes", "Terraform", "Linux", "Git", "GraphQL", "REST",
+    "Machine Learning", "PyTorch", "TensorFlow", "scikit-learn", "Pandas", "Tableau", "Figma",
+]
+# Skills that are also ordinary English words only match with their exact capitalization
+CASE_SENSITIVE_SKILLS = {"Go", "Rust", "Swift", "Spring", "Rails", "REST", "Spark", "Git"}
+_SKILL_PATTERNS = [
+    (skill, re.compile(r'(?<![\w.+#])' + re.escape(skill) + r'(?![\w+#])',
+                       0 if skill in CASE_SENSITIVE_SKILLS else re.IGNORECASE))
+    for skill in KNOWN_SKILLS
+]
+
+
+class ExtractionStats:
+    """Counts structured-data hits and estimates the LLM time they saved"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.attempts = 0
+        self.hits = {}
+        self.parse_seconds = 0.0
+        self.llm_calls = 0
+        self.llm_seconds = 0.0
+
+    def record_parse(self, source, seconds):
+        with self._lock:
+            self.attempts += 1
+            self.parse_seconds += seconds
+            if source:
+                self.hits[source] = self.hits.get(source, 0) + 1
+
+    def record_llm(self, seconds):
+        with self._lock:
+            self.llm_calls += 1
+            self.llm_seconds += seconds
+
+    def summary(self):
+        with self._lock:
+            hit_count = sum(self.hits.values())
+            avg_llm = self.llm_seconds / self.llm_calls if self.llm_calls else 0.0
+            return {
+                "attempts": self.attempts,
+                "hits": dict(self.hits),
+                "hit_rate": round(hit_count / self.attempts, 3) if self.attempts else 0.0,
+                "avg_parse_ms": round(self.parse_seconds / self.attempts * 1000, 3) if self.attempts else 0.0,
+                "avg_llm_extract_ms": round(avg_llm * 1000, 3),
+                "estimated_seconds_saved": round(hit_count * avg_llm - self.parse_seconds, 3),
+            }
+
+
+stats = ExtractionStats()
+
+
+def _text(html_fragment):
+    """Turn an HTML fragment (descriptions are often HTML) into plain text"""
+    from bs4 import BeautifulSoup
+    return ' '.join(BeautifulSoup(html_fragment or "", "html.parser").get_text(" ").split())
+
+
+def _skills_from_text(text):
+    return [skill for skill, pattern in _SKILL_PATTERNS if pattern.search(text)]
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return value
+    return [value]
+
+
+def _make_job(role, company, experience, skills, description):
+    """Build the same dict Chain.extract_jobs returns, or None if the essentials are missing"""
+    role = ' '.join(str(role or "").split())
+    description = ' '.join(str(description or "").split())
+    if not role or not description:
+        return None
+
+    if isinstance(skills, str):
+        skills = [skill.strip() for skill in re.split(r'[,;\n•]', skills) if skill.strip()]
+    skills = [str(skill).strip() for skill in skills or [] if str(skill).strip()]
+    if not skills:
+        skills = _skills_from_text(description)
+
+    return {
+        "role": role,
+        "company": ' '.join(str(company or "").split()) or "Unknown Company",
+        "experience": ' '.join(str(experience or "").split()),
+        "skills": skills,
+        "description": description,
+    }
+
+
+def _experience_from_schema(value):
+    """experienceRequirements is either free text or an OccupationalExperienceRequirements object"""
+    if isinstance(value, dict):
+        months = value.get("monthsOfExperience")
+        if months:
+            try:
+                return f"{int(float(months)) // 12}+ years"
+            except (TypeError, ValueError):
+                return str(months)
+        return value.get("description", "")
+    return _text(value) if isinstance(value, str) else ""
+
+
+def _iter_json_ld_nodes(data):
+    """Walk JSON-LD documents, including @graph containers and nested lists"""
+    for node in _as_list(data):
+        if not isinstance(node, dict):
+            continue
+        yield node
+        if "@graph" in node:
+            yield from _iter_json_ld_nodes(node["@graph"])
+
+
+def _is_job_posting(node):
+    return any(str(kind).split("/")[-1] == "JobPosting" for kind in _as_list(node.get("@type")))
+
+
+def parse_json_ld(soup):
+    jobs = []
+    for script in soup.find_all("script", type="application/ld+json"):
+        try:
+            data = json.loads(script.string or script.get_text() or "")
+        except ValueError:
+            continue
+        for node in _iter_json_ld_nodes(data):
+            if not _is_job_posting(node):
+                continue
+            organization = node.get("hiringOrganization")
+            company = organization.get("name") if isinstance(organization, dict) else organization
+            job = _make_job(
+                node.get("title"),
+                company,
+                _experience_from_schema(node.get("experienceRequirements")),
+                node.get("skills") or [],
+                _text(node.get("description")),
+            )
+            if job:
+                jobs.append(job)
+    return jobs
+
+
+def parse_microdata(soup):
+    jobs = []
+    for item in soup.find_all(attrs={"itemtype": re.compile(r'schema\.org/JobPosting', re.IGNORECASE)}):
+        def prop(name):
+            element = item.find(attrs={"itemprop": name})
+            if element is None:
+                return ""
+            return element.get("content") or element.get_text(" ")
+
+        organization = item.find(attrs={"itemprop": "hiringOrganization"})
+        company = ""
+        if organization is not None:
+            name = organization.find(attrs={"itemprop": "name"})
+            company = (name.get("content") or name.get_text(" ")) if name is not None else organization.get_text(" ")
+
+        job = _make_job(prop("title"), company, prop("experienceRequirements"), prop("skills"), prop("description"))
+        if job:
+            jobs.append(job)
+    return jobs
+
+
+def _select_text(soup, *selectors):
+    for selector in selectors:
+        element = soup.select_one(selector)
+        if element is not None:
+            return element.get_text(" ")
+    return ""
+
+
+def _company_from_board_path(url):
+    """Greenhouse and Lever URLs carry the company slug as the first path segment"""
+    segments = [segment for segment in urlparse(url).path.split("/") if segment]
+    return segments[0].replace("-", " ").title() if segments else ""
+
+
+def parse_greenhouse(url, soup):
+    # The company line reads "at Acme"
+    company = ' '.join(_select_text(soup, ".company-name").split())
+    if company.lower().startswith("at "):
+        company = company[3:]
+    job = _make_job(
+        _select_text(soup, "h1.app-title", ".job__title h1", "h1.section-header"),
+        company or _company_from_board_path(url),
+        "",
+        [],
+        _select_text(soup, "#content", ".job__description"),
+    )
+    return [job] if job else []
+
+
+def parse_lever(url, soup):
+    job = _make_job(
+        _select_text(soup, ".posting-headline h2"),
+        _company_from_board_path(url),
+        "",
+        [],
+        _select_text(soup, '[data-qa="job-description"]', ".section-wrapper.page-full-width", ".content"),
+    )
+    return [job] if job else []
+
+
+def parse_workday(url, soup):
+    job = _make_job(
+        _select_text(soup, '[data-automation-id="jobPostingHeader"]'),
+        (extract_company_from_workday(url) or "").title(),
+        "",
+        [],
+        _select_text(soup, '[data-automation-id="jobPostingDescription"]'),
+    )
+    return [job] if job else []
+
+
+# Known applicant tracking systems, matched on the posting host
+ATS_PARSERS = (
+    ("greenhouse", ("greenhouse.io",), parse_greenhouse),
+    ("lever", ("lever.co",), parse_lever),
+    ("workday", WORKDAY_HOSTS, parse_workday),
+)
+
+
+def extract_structured_jobs(url, html):
+    """
+    Read job postings straight from structured data in the raw HTML:
+    schema.org JobPosting JSON-LD, then microdata, then known ATS layouts.
+    Returns (jobs, source) with the same dicts Chain.extract_jobs produces,
+    or ([], None) when the page has to go through the LLM.
+    """
+    from bs4 import BeautifulSoup
+
+    start = time.perf_counter()
+    jobs, source = [], None
+    if html:
+        soup = BeautifulSoup(html, "html.parser")
+        jobs = parse_json_ld(soup)
+        source = "json-ld" if jobs else None
+
+        if not jobs:
+            jobs = parse_microdata(soup)
+            source = "microdata" if jobs else None
+
+        if not jobs:
+            host = urlparse(url).netloc.lower()
+            for name, hosts, parser in ATS_PARSERS:
+                if any(host == known or host.endswith("." + known) for known in hosts):
+                    jobs = parser(url, soup)
+                    source = name if jobs else None
+                    break
+
+    stats.record_parse(source, time.perf_counter() - start)
+    return jobs, source
@@ -0,0 +1,352 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from database import SessionLocal
+from utils import clean_text, find_recruiter_email, page_fingerprint, RecruiterLookupError
+import db_operations as db_ops
+import structured_data
+import template_reuse
+
+# Default size of the worker pool shared by every Streamlit session in the process
+DEFAULT_WORKERS = int(os.getenv("TASK_WORKERS", "4"))
+
+# Saved jobs fetched or checked within this many hours are reused without fetching the page again
+SAVED_JOB_MAX_AGE_HOURS = float(os.getenv("SAVED_JOB_MAX_AGE_HOURS", "24"))
+
+# Rows between progress updates while exporting
+EXPORT_PROGRESS_EVERY = 200
+
+# Companies whose recruiter email is remembered between generate tasks, and for how long
+RECRUITER_EMAIL_CACHE_SIZE = 256
+RECRUITER_EMAIL_TTL_SECONDS = int(os.getenv("RECRUITER_EMAIL_TTL_SECONDS", str(6 * 60 * 60)))
+
+# Document types as shown in the UI, mapped to the stored document_type
+DOCUMENT_TYPES = {
+    "Cover Letter": "cover_letter",
+    "Resume": "resume",
+    "Cold Email": "cold_email",
+}
+
+
+class TaskQueue:
+    """
+    Persistent local task queue backed by the tasks table.
+
+    A submission is split into fetch -> extract -> generate tasks. Each task is
+    stored before it runs, so work survives Streamlit reruns and tasks left
+    behind by a crashed process are picked up again on the next start.
+    """
+
+    def __init__(self, max_workers=DEFAULT_WORKERS, chain=None):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="task-worker")
+        self._chain = chain
+        self._chain_lock = threading.Lock()
+        self._recruiter_emails = {}
+        self._email_lock = threading.Lock()
+        self.handlers = {
+            "fetch": self._handle_fetch,
+            "extract": self._handle_extract,
+            "generate": self._handle_generate,
+            "refresh": self._handle_refresh,
+            "export": self._handle_export,
+        }
+        self._recover()
+
+    @property
+    def chain(self):
+        # Build the LLM client on first use so a missing key fails the task, not the app
+        with self._chain_lock:
+            if self._chain is None:
+                from chains import Chain
+                self._chain = Chain()
+            return self._chain
+
+    def submit_generation(self, user_id, url, option, save_job=False, find_email=False, reuse_documents=False,
+                          refetch=False):
+        """
+        Enqueue the pipeline for a job URL and return the root task id.
+        Pass refetch to fetch the page even when recently saved jobs cover it.
+        """
+        payload = {
+            "url": url,
+            "option": option,
+            "save_job": save_job,
+            "find_email": find_email,
+            "reuse_documents": reuse_documents,
+            "refetch": refetch,
+        }
+        db = SessionLocal()
+        try:
+            task = db_ops.create_task(db, user_id, "fetch", payload)
+            task_id = task.id
+        finally:
+            db.close()
+        self.dispatch(task_id)
+        return task_id
+
+    def submit_refresh(self, user_id, job_id):
+        """Enqueue a re-check of a saved job against its live posting and return the task id"""
+        db = SessionLocal()
+        try:
+            task_id = db_ops.create_task(db, user_id, "refresh", {"job_id": job_id}).id
+        finally:
+            db.close()
+        self.dispatch(task_id)
+        return task_id
+
+    def submit_export(self, user_id, fmt):
+        """Enqueue a bulk export of the user's jobs and documents and return the task id"""
+        db = SessionLocal()
+        try:
+            task_id = db_ops.create_task(db, user_id, "export", {"format": fmt}).id
+        finally:
+            db.close()
+        self.dispatch(task_id)
+        return task_id
+
+    def dispatch(self, task_id):
+        return self.executor.submit(self._run, task_id)
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
+
+    def _recover(self):
+        """Re-dispatch tasks that were pending or interrupted when the process stopped"""
+        db = SessionLocal()
+        try:
+            db_ops.requeue_running_tasks(db)
+            task_ids = [task.id for task in db_ops.get_unfinished_tasks(db)]
+        finally:
+            db.close()
+        for task_id in task_ids:
+            self.dispatch(task_id)
+
+    def _enqueue_child(self, db, parent, kind, payload):
+        child = db_ops.create_task(db, parent.user_id, kind, payload, root_id=parent.root_id, parent_id=parent.id)
+        return child.id
+
+    def _run(self, task_id):
+        db = SessionLocal()
+        try:
+            task = db_ops.claim_task(db, task_id)
+            if task is None:
+                return
+
+            children = []
+            try:
+                handler = self.handlers[task.kind]
+                result, children = handler(db, task, json.loads(task.payload or "{}"))
+            except Exception as e:
+                db.rollback()
+                db_ops.finish_task(db, task, error=str(e))
+                return
+
+            db_ops.finish_task(db, task, result=result)
+            for child_id in children:
+                self.dispatch(child_id)
+        finally:
+            db.close()
+
+    # Task handlers return (result, [child task ids to dispatch])
+
+    def _handle_fetch(self, db, task, payload):
+        # Fast path: the user recently saved this posting, so skip fetch and extraction.
+        # Older saves are fetched again, since a careers page may list new postings since.
+        saved_jobs = [] if payload.get("refetch") else db_ops.get_jobs_by_url(db, task.user_id, payload["url"])
+        fresh_after = datetime.utcnow() - timedelta(hours=SAVED_JOB_MAX_AGE_HOURS)
+        if saved_jobs and max(job.last_checked or job.date_saved or datetime.min for job in saved_jobs) >= fresh_after:
+            children = self._enqueue_generate(db, task, payload, [
+                (db_ops.job_to_dict(job), job.id if payload.get("save_job") else None) for job in saved_jobs
+            ])
+            return {"reused_jobs": len(saved_jobs)}, children
+
+        from fetcher import fetch_page
+
+        # Static pages stay on plain HTTP; JS-rendered ones go through the browser pool
+        page = fetch_page(payload["url"])
+        result = {
+            "rendered": page["rendered"],
+            "render_seconds": round(page["render_seconds"], 3),
+        }
+        # Stored with saved jobs so later re-checks can diff the page
+        payload = {**payload, "page_fingerprint": page_fingerprint(page["text"])}
+
+        # Fast path: JSON-LD, microdata or a known ATS layout already has the fields
+        jobs, source = structured_data.extract_structured_jobs(payload["url"], page["html"])
+        if jobs:
+            result.update(structured_source=source, jobs=len(jobs))
+            return result, self._enqueue_jobs(db, task, payload, jobs)
+
+        text = clean_text(page["text"])
+        child_id = self._enqueue_child(db, task, "extract", {**payload, "page_text": text})
+        result["characters"] = len(text)
+        return result, [child_id]
+
+    def _handle_extract(self, db, task, payload):
+        # Jobs queued by an earlier, interrupted run of this task aren't queued twice
+        already_queued = db_ops.count_child_tasks(db, task.id)
+        start = time.perf_counter()
+        jobs = 0
+        for job in self.chain.stream_jobs(payload["page_text"]):
+            jobs += 1
+            if jobs <= already_queued:
+                continue
+            # Start generating for this job while the rest of the response streams in
+            for child_id in self._enqueue_jobs(db, task, payload, [job]):
+                self.dispatch(child_id)
+        structured_data.stats.record_llm(time.perf_counter() - start)
+        return {"jobs": jobs}, []
+
+    def _enqueue_jobs(self, db, task, payload, jobs):
+        """Save the extracted jobs if requested and queue a generate task for each, in one transaction"""
+        job_ids = [None] * len(jobs)
+        if payload.get("save_job"):
+            jobs_data = [
+                {
+                    "url": payload["url"],
+                    "company": job.get('company', 'Unknown Company'),
+                    "role": job.get('role', 'Unknown Role'),
+                    "description": job.get('description', ''),
+                    "experience": job.get('experience', ''),
+                    "skills": job.get('skills', []),
+                    **payload.get("page_fingerprint", {})
+                }
+                for job in jobs
+            ]
+            job_ids = [db_job.id for db_job, _ in db_ops.upsert_jobs(db, task.user_id, jobs_data, commit=False)]
+        return self._enqueue_generate(db, task, payload, list(zip(jobs, job_ids)))
+
+    def _enqueue_generate(self, db, parent, payload, jobs):
+        """Queue a generate task for each (job, job_id) pair and commit them together"""
+        child_payloads = [
+            {
+                "option": payload["option"],
+                "find_email": payload.get("find_email", False),
+                "reuse_documents": payload.get("reuse_documents", False),
+                "job": job,
+                "job_id": job_id,
+            }
+            for job, job_id in jobs
+        ]
+        children = db_ops.create_child_tasks(db, parent, "generate", child_payloads, commit=False)
+        child_ids = [child.id for child in children]
+        db.commit()
+        return child_ids
+
+    def _recruiter_email(self, company):
+        """
+        Hunter lookup, remembered per company for RECRUITER_EMAIL_TTL_SECONDS so
+        jobs from one careers page share a single call. "No email found" is
+        remembered too; a lookup that failed (missing key, timeout, API error)
+        is not, so the next job retries. Concurrent callers for the same company
+        wait on the lookup already in flight instead of starting their own.
+        """
+        now = time.monotonic()
+        with self._email_lock:
+            entry = self._recruiter_emails.get(company)
+            if entry is not None and entry[0].done() and entry[1] <= now:
+                del self._recruiter_emails[company]
+                entry = None
+            owner = entry is None
+            if owner:
+                if len(self._recruiter_emails) >= RECRUITER_EMAIL_CACHE_SIZE:
+                    self._recruiter_emails.pop(next(iter(self._recruiter_emails)))
+                entry = self._recruiter_emails[company] = (Future(), now + RECRUITER_EMAIL_TTL_SECONDS)
+        lookup = entry[0]
+        if not owner:
+            return lookup.result()
+
+        try:
+            email = find_recruiter_email(company, raise_errors=True)
+        except Exception as e:
+            with self._email_lock:
+                if self._recruiter_emails.get(company) is entry:
+                    del self._recruiter_emails[company]
+            # The cold email is still written, just without a recruiter address
+            email = None
+            if not isinstance(e, RecruiterLookupError):
+                lookup.set_exception(e)
+                raise
+        lookup.set_result(email)
+        return email
+
+    def _handle_generate(self, db, task, payload):
+        job = payload["job"]
+        option = payload["option"]
+
+        # Get user's portfolio items that match the job skills
+        skills = job.get('skills', [])
+        portfolio_items = db_ops.query_portfolio_by_skills(db, task.user_id, skills)
+        portfolio_data = [{"techstack": item.tech_stack, "links": item.link} for item in portfolio_items]
+
+        # Get recruiter email if option is selected and it's a cold email
+        recruiter_email = None
+        if payload.get("find_email") and option == "Cold Email":
+            recruiter_email = self._recruiter_email(job.get('company', ''))
+
+        # Adapt a similar earlier document when allowed; a targeted edit is far fewer output tokens
+        output, reused_from = None, None
+        if payload.get("reuse_documents"):
+            output, reused_from = template_reuse.adapt_document(
+                db, self.chain, task.user_id, job, DOCUMENT_TYPES[option], portfolio_data, recruiter_email
+            )
+
+        # Generate document based on selected option
+        if output is None:
+            start = time.perf_counter()
+            if option == "Cover Letter":
+                output = self.chain.write_letter(job, portfolio_data)
+            elif option == "Resume":
+                output = self.chain.write_resume(job)
+            else:  # Cold Email
+                output = self.chain.write_cold_email(job, portfolio_data, recruiter_email)
+            if option != "Resume":
+                template_reuse.stats.record_full(time.perf_counter() - start)
+
+        document = db_ops.create_generated_document(
+            db, payload.get("job_id"), DOCUMENT_TYPES[option], output, task_id=task.id
+        )
+        result = {
+            "document_id": document.id,
+            "job_id": payload.get("job_id"),
+            "role": job.get('role', 'Unknown Role'),
+            "searched_email": bool(payload.get("find_email")) and option == "Cold Email",
+            "recruiter_email": recruiter_email,
+            "reused_document_id": reused_from,
+        }
+        return result, []
+
+    def _handle_refresh(self, db, task, payload):
+        from fetcher import fetch_page
+        from job_refresh import recheck_job
+
+        job = db_ops.get_job_by_id(db, payload["job_id"])
+        if job is None or job.user_id != task.user_id:
+            raise ValueError("Saved job not found")
+
+        page = fetch_page(job.url)
+        result = recheck_job(db, job, page["text"], lambda text: self.chain.extract_jobs(text))
+        # Read the role back from the row that now holds the job, which is another one after a merge
+        saved = db_ops.get_job_by_id(db, result.get("merged_into", result["job_id"]))
+        result["role"] = saved.role if saved else None
+        return result, []
+
+    def _handle_export(self, db, task, payload):
+        import exporter
+
+        fmt = payload["format"]
+        path = exporter.export_path(task.user_id, task.id, fmt)
+        total = exporter.count_user_rows(db, task.user_id)
+
+        # The exporter reads in keyset pages with no cursor left open, so progress
+        # can be committed on the same session between rows
+        def progress(written):
+            if written % EXPORT_PROGRESS_EVERY == 0:
+                db_ops.update_task_progress(db, task.id, {"written": written, "total": total})
+
+        written = exporter.export_user_data(db, task.user_id, fmt, path, progress=progress)
+        return {"path": path, "format": fmt, "written": written, "total": total}, []
@@ -0,0 +1,174 @@
+import json
+import os
+import re
+import threading
+import time
+
+import db_operations as db_ops
+
+# Minimum share of skills two jobs must have in common before a document is reused
+REUSE_MIN_SKILL_OVERLAP = float(os.getenv("REUSE_MIN_SKILL_OVERLAP", "0.5"))
+
+# Prior documents considered per lookup, most recent first
+REUSE_CANDIDATES = 50
+
+# Document types worth adapting; resumes are restructured per job rather than edited
+REUSABLE_TYPES = ("cover_letter", "cold_email")
+
+# Seniority words dropped from a role title so "Senior Data Engineer" and "Data Engineer II" are one family
+SENIORITY_WORDS = {
+    "senior", "sr", "junior", "jr", "lead", "staff", "principal", "intern", "associate",
+    "mid", "level", "i", "ii", "iii", "iv",
+}
+
+
+class ReuseStats:
+    """Counts how often a prior document was adapted and estimates the generation time it saved"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.adapted = 0
+        self.adapt_seconds = 0.0
+        self.failed_seconds = 0.0
+        self.full_generations = 0
+        self.full_seconds = 0.0
+
+    def record_lookup(self):
+        with self._lock:
+            self.lookups += 1
+
+    def record_adapted(self, seconds):
+        with self._lock:
+            self.adapted += 1
+            self.adapt_seconds += seconds
+
+    def record_failed(self, seconds):
+        # An edit that couldn't be applied still cost a model call
+        with self._lock:
+            self.failed_seconds += seconds
+
+    def record_full(self, seconds):
+        with self._lock:
+            self.full_generations += 1
+            self.full_seconds += seconds
+
+    def summary(self):
+        with self._lock:
+            avg_full = self.full_seconds / self.full_generations if self.full_generations else 0.0
+            return {
+                "lookups": self.lookups,
+                "adapted": self.adapted,
+                "fast_path_rate": round(self.adapted / self.lookups, 3) if self.lookups else 0.0,
+                "avg_adapt_ms": round(self.adapt_seconds / self.adapted * 1000, 3) if self.adapted else 0.0,
+                "avg_full_generation_ms": round(avg_full * 1000, 3),
+                "estimated_seconds_saved": round(
+                    self.adapted * avg_full - self.adapt_seconds - self.failed_seconds, 3
+                ),
+            }
+
+
+stats = ReuseStats()
+
+
+def skill_set(skills):
+    """Normalize skills from a list or the comma-separated string stored on a saved job"""
+    if isinstance(skills, str):
+        skills = skills.split(",")
+    return {' '.join(str(skill).lower().split()) for skill in skills or [] if str(skill).strip()}
+
+
+def role_family(role):
+    words = re.findall(r'[a-z0-9+#.]+', str(role or "").lower())
+    return {word for word in words if word not in SENIORITY_WORDS}
+
+
+def _overlap(a, b):
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def _candidate_job(job, task):
+    """The job a prior document was written for, from the saved job or the generating task"""
+    if job is not None:
+        return {field: getattr(job, field) for field in db_ops.JOB_FIELDS}
+    if task is not None:
+        return json.loads(task.payload).get("job")
+    return None
+
+
+def find_similar_document(db, user_id, job, document_type):
+    """
+    The user's prior document of this type whose job is in the same role family
+    and shares the most skills with job. Returns (document, base job dict, score)
+    or (None, None, 0.0) when nothing is close enough.
+    """
+    skills = skill_set(job.get("skills"))
+    family = role_family(job.get("role"))
+    best = (None, None, 0.0)
+    for document, saved_job, task in db_ops.get_recent_user_documents(db, user_id, document_type, REUSE_CANDIDATES):
+        base_job = _candidate_job(saved_job, task)
+        if not base_job or not family & role_family(base_job.get("role")):
+            continue
+        score = _overlap(skills, skill_set(base_job.get("skills")))
+        if score >= REUSE_MIN_SKILL_OVERLAP and score > best[2]:
+            best = (document, base_job, score)
+    return best
+
+
+def apply_edits(base_document, edits):
+    """
+    Apply find/replace edits to a document, replacing every occurrence. Returns
+    None unless most edits matched the base text, since a mismatched edit would
+    leave stale details behind.
+    """
+    content, applied = base_document, 0
+    for edit in edits:
+        if not isinstance(edit, dict):
+            continue
+        find, replace = edit.get("find"), edit.get("replace")
+        if not isinstance(find, str) or not find or not isinstance(replace, str) or find not in content:
+            continue
+        content = content.replace(find, replace)
+        applied += 1
+    if not applied or applied * 2 < len(edits):
+        return None
+    return content
+
+
+def stale_details(content, base_job, job):
+    """The base job's company and role where they differ from job but still appear in content"""
+    stale = []
+    for field in ("company", "role"):
+        old = ' '.join(str(base_job.get(field) or "").split())
+        new = ' '.join(str(job.get(field) or "").split())
+        if not old or old.lower() in new.lower():
+            continue
+        if re.search(r'(?<!\w)' + re.escape(old) + r'(?!\w)', content, re.IGNORECASE):
+            stale.append(field)
+    return stale
+
+
+def adapt_document(db, chain, user_id, job, document_type, portfolio_data, recipient=None):
+    """
+    Produce a document by editing the most similar one the user already has.
+    Returns (content, source document id), or (None, None) to fall back to a full generation.
+    """
+    if document_type not in REUSABLE_TYPES:
+        return None, None
+
+    stats.record_lookup()
+    document, base_job, _ = find_similar_document(db, user_id, job, document_type)
+    if document is None:
+        return None, None
+
+    start = time.perf_counter()
+    edits = chain.edit_document(document.content, base_job, job, portfolio_data, recipient)
+    content = apply_edits(document.content, edits)
+    elapsed = time.perf_counter() - start
+
+    # Anything still naming the previous company or role would leak into this application
+    if content is None or stale_details(content, base_job, job):
+        stats.record_failed(elapsed)
+        return None, None
+    stats.record_adapted(elapsed)
+    return content, document.id
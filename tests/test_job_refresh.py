@@ -0,0 +1,68 @@
+import json
+from types import SimpleNamespace
+
+from job_refresh import diff_job
+from utils import page_fingerprint
+
+PARAGRAPHS = [
+    "Backend Engineer at Acme",
+    "You will build and run the services behind our ordering platform",
+    "Requirements Python Django and three years of experience",
+    "We offer remote work and a learning budget",
+]
+
+
+def saved_job(page_text, **fields):
+    fingerprint = page_fingerprint(page_text)
+    values = {
+        "id": 1,
+        "role": "Backend Engineer",
+        "company": "Acme",
+        "experience": "3 years",
+        "skills": "Python, Django",
+        "description": "Build and run the services behind our ordering platform",
+        "content_hash": fingerprint["content_hash"],
+        "chunk_hashes": json.dumps(fingerprint["chunk_hashes"]),
+    }
+    values.update(fields)
+    return SimpleNamespace(**values)
+
+
+def test_partial_change_to_skills_reextracts_full_page():
+    old_page = "\n".join(PARAGRAPHS)
+    new_page = old_page.replace("Python Django", "Python Django Kafka")
+    calls = []
+
+    def extract_jobs(text):
+        calls.append(text)
+        return [{
+            "role": "Backend Engineer",
+            "skills": ["Python", "Django", "Kafka"],
+            "description": "Build and run the services behind our ordering platform with Kafka",
+        }]
+
+    result, updates = diff_job(saved_job(old_page), new_page, extract_jobs)
+
+    assert len(calls) == 2
+    assert "ordering platform" in calls[1]
+    assert result["extraction"] == "full"
+    assert updates["skills"] == "Python, Django, Kafka"
+    assert updates["description"].endswith("with Kafka")
+    assert updates["content_hash"] == page_fingerprint(new_page)["content_hash"]
+
+
+def test_partial_change_without_description_or_skills_stays_partial():
+    old_page = "\n".join(PARAGRAPHS)
+    new_page = old_page.replace("three years", "five years")
+    calls = []
+
+    def extract_jobs(text):
+        calls.append(text)
+        return [{"role": "Backend Engineer", "experience": "5 years"}]
+
+    result, updates = diff_job(saved_job(old_page), new_page, extract_jobs)
+
+    assert len(calls) == 1
+    assert result["extraction"] == "partial"
+    assert updates["experience"] == "5 years"
+    assert "skills" not in updates and "description" not in updates
@@ -1,8 +1,22 @@
 import re
 import os
-import requests
+import hashlib
 import streamlit as st
-from urllib.parse import urlparse, parse_qs
+from urllib.parse import urlparse, parse_qs, parse_qsl, urlencode, urlunparse
+
+# Query parameters that only track where a visitor came from
+TRACKING_PARAMS = {"ref", "source", "src", "gh_src", "lever-source", "lever-origin", "trk", "fbclid", "gclid"}
+
+# Seconds to wait for a Hunter.io response
+HUNTER_TIMEOUT_SECONDS = 10
+
+
+class RecruiterLookupError(Exception):
+    """The Hunter.io lookup couldn't be made (no API key, network or API error), as opposed to finding no email"""
+
+
+# Hosts Workday serves career sites from, including the wd3.myworkday.com/<company> form
+WORKDAY_HOSTS = ("myworkdayjobs.com", "myworkdaysite.com", "myworkday.com", "workday.com")
 
 def clean_text(text):
     # Remove HTML tags
@@ -19,6 +33,53 @@ def clean_text(text):
     text = ' '.join(text.split())
     return text
 
+def split_chunks(text):
+    """Split page text into cleaned paragraphs, the unit used to diff a page between scrapes"""
+    chunks = []
+    for paragraph in re.split(r'\n+', text or ""):
+        chunk = clean_text(paragraph)
+        if chunk:
+            chunks.append(chunk)
+    return chunks
+
+
+def chunk_hash(chunk):
+    return hashlib.sha1(chunk.lower().encode("utf-8")).hexdigest()[:16]
+
+
+def page_fingerprint(text):
+    """Hash of the whole cleaned page plus one hash per paragraph"""
+    chunks = split_chunks(text)
+    return {
+        "content_hash": hashlib.sha256(' '.join(chunks).lower().encode("utf-8")).hexdigest(),
+        "chunk_hashes": [chunk_hash(chunk) for chunk in chunks],
+    }
+
+
+def normalize_url(url):
+    """Normalize a job URL so the same posting always maps to the same string"""
+    parsed = urlparse((url or "").strip())
+    host = parsed.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    path = parsed.path.rstrip("/") or "/"
+    
+    # Drop tracking parameters and sort the rest so parameter order doesn't matter
+    query = [
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith("utm_")
+    ]
+    query.sort()
+    
+    return urlunparse((parsed.scheme.lower() or "https", host, path, "", urlencode(query), ""))
+
+
+def job_fingerprint(url, role, company, description):
+    """Hash the normalized URL and extracted job content into a stable fingerprint"""
+    parts = [normalize_url(url)] + [' '.join(str(value or "").lower().split()) for value in (role, company, description)]
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
 def extract_company_from_workday(url):
     """Extract company name from Workday URL"""
     try:
@@ -44,18 +105,27 @@ def extract_company_from_workday(url):
     except Exception:
         return None
 
-def find_recruiter_email(company_name, department=None):
+def find_recruiter_email(company_name, department=None, raise_errors=False):
     """
-    Attempts to find a recruiter email for the given company and department using Hunter.io API
+    Attempts to find a recruiter email for the given company and department using Hunter.io API.
+    With raise_errors, a missing API key or a failed request raises RecruiterLookupError
+    instead of returning None, so callers can tell it from a company with no email found.
     """
     # Try to get API key from Streamlit secrets first, then fall back to environment variable
     api_key = st.secrets.get("HUNTER_API_KEY", os.getenv("HUNTER_API_KEY"))
     
-    if not api_key or not company_name:
+    if not company_name:
+        return None
+    
+    if not api_key:
+        if raise_errors:
+            raise RecruiterLookupError("Hunter.io API key not found")
         st.warning("Hunter.io API key not found. Please add it to your Streamlit secrets.")
         return None
         
     try:
+        import requests
+
         # Clean the company name
         company_name = company_name.strip().lower()
         company_name = re.sub(r'\s+(inc|llc|corp|ltd|co)\.?$', '', company_name, flags=re.IGNORECASE)
@@ -64,7 +134,10 @@ def find_recruiter_email(company_name, department=None):
         
         # Make request to Hunter.io API
         url = f"https://api.hunter.io/v2/domain-search?domain={domain}&api_key={api_key}"
-        response = requests.get(url)
+        response = requests.get(url, timeout=HUNTER_TIMEOUT_SECONDS)
+        
+        if response.status_code != 200 and raise_errors:
+            raise RecruiterLookupError(f"Hunter.io returned HTTP {response.status_code}")
         
         if response.status_code == 200:
             data = response.json()
@@ -120,7 +193,11 @@ def find_recruiter_email(company_name, department=None):
             if emails:
                 return emails[0].get('value')
     
+    except RecruiterLookupError:
+        raise
     except Exception as e:
+        if raise_errors:
+            raise RecruiterLookupError(f"Error finding recruiter email: {e}") from e
         st.error(f"Error finding recruiter email: {e}")
     
     return None
\ No newline at end of file